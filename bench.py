@@ -0,0 +1,321 @@
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import lzma
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import repogen
+
+# Mỗi lần tạo dữ liệu ngẫu nhiên một khối rồi lặp lại: checksum vẫn phải đọc hết
+# từng byte nhưng tạo corpus nhanh hơn nhiều so với os.urandom cho cả file
+RANDOM_BLOCK = 4 << 20
+SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_size(value):
+    value = value.strip().upper().rstrip("B")
+    if value[-1:] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def _ar_header(name, size):
+    return f"{name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{size:<10}`\n".encode("ascii")
+
+
+def _write_ar_member(out, name, data):
+    out.write(_ar_header(name, len(data)))
+    out.write(data)
+    if len(data) % 2:
+        out.write(b"\n")
+
+
+def _compress(data, compression):
+    if compression == "gz":
+        return gzip.compress(data, 6, mtime=0)
+    if compression == "xz":
+        return lzma.compress(data, lzma.FORMAT_XZ)
+    if compression == "zst":
+        return repogen.deb.zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _control_tar(index, compression):
+    control = (
+        f"Package: com.bench.pkg{index:05d}\n"
+        f"Name: Bench {index}\n"
+        f"Version: 1.0.{index}\n"
+        "Architecture: iphoneos-arm64\n"
+        "Section: Tweaks\n"
+        "Maintainer: Bench\n"
+        "Author: Bench\n"
+        "Depends: firmware (>= 14.0), mobilesubstrate\n"
+        f"Description: Gói giả lập số {index} dùng cho benchmark\n"
+    ).encode("utf-8")
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=tarfile.GNU_FORMAT) as tar:
+        info = tarfile.TarInfo("./control")
+        info.size = len(control)
+        tar.addfile(info, io.BytesIO(control))
+    return _compress(buf.getvalue(), compression)
+
+
+class _RepeatingReader:
+    def __init__(self, block, size):
+        self._block = block
+        self._remaining = size
+        self._pos = 0
+
+    def read(self, n=-1):
+        if n < 0:
+            n = self._remaining
+        n = min(n, self._remaining)
+        out = bytearray()
+        while len(out) < n:
+            take = min(n - len(out), len(self._block) - self._pos)
+            out += self._block[self._pos:self._pos + take]
+            self._pos = (self._pos + take) % len(self._block)
+        self._remaining -= n
+        return bytes(out)
+
+
+def write_synthetic_deb(path, index, data_size, control_compression, block):
+    """Ghi một .deb hợp lệ: control.tar.<nén> và data.tar chứa một file data_size byte.
+
+    data.tar được ghi thẳng vào file ar rồi sửa lại trường size trong header, nên
+    không cần giữ cả data.tar trong bộ nhớ.
+    """
+    with open(path, "wb") as out:
+        out.write(repogen.deb.AR_MAGIC)
+        _write_ar_member(out, "debian-binary", b"2.0\n")
+        _write_ar_member(out, f"control.tar.{control_compression}", _control_tar(index, control_compression))
+
+        header_pos = out.tell()
+        out.write(_ar_header("data.tar", 0))
+        start = out.tell()
+        with tarfile.open(fileobj=out, mode="w|", format=tarfile.GNU_FORMAT) as tar:
+            info = tarfile.TarInfo(f"./var/jb/bench/pkg{index:05d}.bin")
+            info.size = data_size
+            tar.addfile(info, _RepeatingReader(block, data_size))
+        size = out.tell() - start
+        if size % 2:
+            out.write(b"\n")
+        out.seek(header_pos)
+        out.write(_ar_header("data.tar", size))
+
+
+def build_corpus(directory, count, sizes, control_compressions):
+    deb_folder = os.path.join(directory, repogen.config.DEB_FOLDER)
+    os.makedirs(deb_folder, exist_ok=True)
+    block = os.urandom(RANDOM_BLOCK)
+    for i in range(count):
+        compression = control_compressions[i % len(control_compressions)]
+        path = os.path.join(deb_folder, f"com.bench.pkg{i:05d}_1.0.{i}.deb")
+        write_synthetic_deb(path, i, sizes[i % len(sizes)], compression, block)
+    # Template cần cho bước render
+    template_folder = repogen.config.TEMPLATE_FOLDER
+    shutil.copytree(os.path.join(REPO_DIR, template_folder), os.path.join(directory, template_folder),
+                    dirs_exist_ok=True)
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _stage_main(conn, stage, deb_paths, extra):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        processed = STAGES[stage](deb_paths, extra)
+        seconds = time.perf_counter() - started
+    conn.send({"seconds": seconds, "bytes": processed, "peak_rss": _peak_rss_bytes()})
+    conn.close()
+
+
+def run_stage(stage, deb_paths, extra=None):
+    """Chạy một bước trong process con riêng để đo được peak RSS của riêng bước đó."""
+    ctx = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_stage_main, args=(child_conn, stage, deb_paths, extra))
+    process.start()
+    child_conn.close()
+    result = parent_conn.recv()
+    process.join()
+    return result
+
+
+def _total_size(deb_paths):
+    return sum(os.path.getsize(path) for path in deb_paths)
+
+
+def _stage_control(deb_paths, extra):
+    for path in deb_paths:
+        repogen.deb.extract_control_info_from_deb(path)
+    return _total_size(deb_paths)
+
+
+def _stage_hash(deb_paths, extra):
+    for path in deb_paths:
+        repogen.hashing.generate_hashes(path)
+    return _total_size(deb_paths)
+
+
+def _stage_scan(deb_paths, extra):
+    for path in deb_paths:
+        repogen.deb.scan_deb(path)
+    return _total_size(deb_paths)
+
+
+def _stage_render(deb_paths, extra):
+    written = 0
+    for path, control in zip(deb_paths, extra["controls"]):
+        short_dir = repogen.render.package_short_dir(os.path.basename(path))
+        repogen.render.create_depiction(control, short_dir)
+        repogen.render.create_html_description(control, short_dir)
+        written += os.path.getsize(os.path.join(repogen.config.DESCRIPTION_FOLDER, short_dir, f"{short_dir}.html"))
+    return written
+
+
+def _stage_serialize(deb_paths, extra):
+    text = "".join(repogen.index.format_stanza(os.path.basename(path), control, hashes, os.path.getsize(path))
+                   for path, control, hashes in zip(deb_paths, extra["controls"], extra["hashes"]))
+    return len(text.encode("utf-8"))
+
+
+def _stage_compress(deb_paths, extra):
+    _, compress, level = repogen.publish.INDEX_FORMATS[extra["format"]]
+    compress(extra["packages"], level)
+    return len(extra["packages"])
+
+
+def _stage_index(deb_paths, extra):
+    repogen.index.generate_packages(rebuild=extra["rebuild"], jobs=extra["jobs"])
+    return _total_size(deb_paths)
+
+
+STAGES = {
+    "control": _stage_control,
+    "hash": _stage_hash,
+    "scan": _stage_scan,
+    "render": _stage_render,
+    "serialize": _stage_serialize,
+    "compress": _stage_compress,
+    "index": _stage_index,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(corpus, jobs=1):
+    os.chdir(corpus)
+    deb_paths = repogen.index.list_debs()
+    scanned = [repogen.deb.scan_deb(path) for path in deb_paths]
+    extra = {"controls": [control for control, _ in scanned], "hashes": [hashes for _, hashes in scanned]}
+    packages = "".join(repogen.index.format_stanza(os.path.basename(path), control, hashes, os.path.getsize(path))
+                       for path, (control, hashes) in zip(deb_paths, scanned)).encode("utf-8")
+
+    plan = [
+        ("control", "control", {}),
+        ("hash", "hash", {}),
+        ("scan", "scan", {}),
+        ("render", "render", extra),
+        ("serialize", "serialize", extra),
+    ]
+    plan += [(f"compress-{fmt}", "compress", {"format": fmt, "packages": packages})
+             for fmt in repogen.publish.available_index_formats()]
+    plan += [
+        ("index-cold", "index", {"rebuild": True, "jobs": jobs}),
+        ("index-warm", "index", {"rebuild": False, "jobs": jobs}),
+    ]
+
+    results = {}
+    for name, stage, stage_extra in plan:
+        result = run_stage(stage, deb_paths, stage_extra)
+        result["packages"] = len(deb_paths)
+        results[name] = result
+        print(f"  {name:<16} {result['seconds']:8.3f}s")
+    return results
+
+
+def print_table(results, baseline=None):
+    print(f"{'Bước':<16} {'Thời gian':>10} {'MB/s':>10} {'gói/s':>10} {'Peak RSS':>10}" +
+          (f" {'so với cũ':>10}" if baseline else ""))
+    for name, result in results.items():
+        seconds = max(result["seconds"], 1e-9)
+        line = (f"{name:<16} {result['seconds']:>9.3f}s {result['bytes'] / seconds / (1 << 20):>10.1f} "
+                f"{result['packages'] / seconds:>10.1f} {result['peak_rss'] / (1 << 20):>8.1f}MB")
+        if baseline and name in baseline:
+            line += f" {(result['seconds'] / max(baseline[name]['seconds'], 1e-9) - 1) * 100:>+9.1f}%"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark các bước của repogen trên bộ .deb giả lập (chạy offline)")
+    parser.add_argument("--count", type=int, default=20, help="Số .deb giả lập (mặc định 20)")
+    parser.add_argument("--sizes", default="64K,1M,16M",
+                        help="Kích thước data.tar, lặp vòng qua danh sách (mặc định 64K,1M,16M)")
+    parser.add_argument("--control", default="gz,xz,zst",
+                        help="Kiểu nén control.tar, lặp vòng qua danh sách (mặc định gz,xz,zst)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="--jobs cho bước index (mặc định 1)")
+    parser.add_argument("--corpus", help="Dùng lại thư mục corpus có sẵn thay vì tạo mới")
+    parser.add_argument("--keep", action="store_true", help="Giữ lại thư mục corpus tạm sau khi chạy")
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--compare", help="So sánh thời gian với file JSON kết quả cũ")
+    args = parser.parse_args()
+
+    compressions = [c.strip() for c in args.control.split(",") if c.strip()]
+    if "zst" in compressions and repogen.deb.zstandard is None:
+        print("⚠️ Chưa cài zstandard, bỏ qua control.tar.zst")
+        compressions = [c for c in compressions if c != "zst"] or ["gz"]
+
+    corpus = args.corpus or tempfile.mkdtemp(prefix="gen-bench-")
+    try:
+        if not args.corpus:
+            sizes = [parse_size(size) for size in args.sizes.split(",")]
+            started = time.perf_counter()
+            build_corpus(corpus, args.count, sizes, compressions)
+            print(f"📦 Đã tạo {args.count} .deb giả lập trong {corpus} ({time.perf_counter() - started:.1f}s)")
+        print("⏱️ Đang đo...")
+        results = run_benchmarks(corpus, jobs=args.jobs)
+    finally:
+        os.chdir(REPO_DIR)
+        if not args.corpus and not args.keep:
+            shutil.rmtree(corpus, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    if args.output:
+        report = {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+            "config": {"count": args.count, "sizes": args.sizes, "control": compressions, "jobs": args.jobs},
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Đã lưu kết quả vào {args.output}")
@@ -1,34 +1,7 @@
 #!/bin/bash
 
-# Thư mục chứa các thư mục đã giải nén
-INPUT_DIR="final"
-# Thư mục chứa các file .deb được đóng gói lại
-OUTPUT_DIR="output_debs"
-
-# Tạo thư mục output nếu chưa có
-mkdir -p "$OUTPUT_DIR"
-
-echo "🔁 Đang build lại các file .deb từ thư mục $INPUT_DIR ..."
-
-# Duyệt từng thư mục con trong final/
-for dir in "$INPUT_DIR"/*; do
-    if [ -d "$dir" ]; then
-        pkg_name=$(basename "$dir")
-        output_path="$OUTPUT_DIR/$pkg_name.deb"
-
-        echo "🧹 Đang dọn dẹp file rác (.DS_Store) trong $pkg_name ..."
-        find "$dir" -name ".DS_Store" -type f -delete
-
-        echo "📦 Đang build: $pkg_name → $output_path"
-        dpkg-deb --build --root-owner-group "$dir" "$output_path"
-
-        # Kiểm tra lỗi
-        if [ $? -eq 0 ]; then
-            echo "✅ Thành công: $pkg_name"
-        else
-            echo "❌ Thất bại: $pkg_name"
-        fi
-    fi
-done
-
-echo "🏁 Đã hoàn tất."
+# Build lại mọi thư mục trong final/ thành output_debs/<tên thư mục>.deb.
+# Việc đóng gói nằm trong repogen (python3 -m repogen build --help): song song,
+# reproducible, tự bỏ qua .DS_Store; thêm --compression gz|xz|zst, -j N, ...
+cd "$(dirname "$0")" || exit 1
+PYTHONPATH="../.." exec python3 -m repogen build --input final --output output_debs "$@"
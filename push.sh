@@ -3,8 +3,9 @@
 # Thoát nếu có lỗi
 set -e
 
-echo "🚀 Chạy generate_bz2.py..."
-python generate_bz2.py   # ❗ dùng python thay vì python3
+echo "🚀 Tạo Packages, trang gói và Release..."
+python -m repogen index   # ❗ dùng python thay vì python3
+python -m repogen verify
 
 echo "📁 Thêm file vào Git..."
 git add .
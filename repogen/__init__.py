@@ -0,0 +1,21 @@
+"""Công cụ tạo repo: đọc debs/, tạo Packages (và các bản nén), Release, depiction và HTML.
+
+Chạy bằng `python3 -m repogen <lệnh>` hoặc `python3 gen.py <lệnh>`; xem `--help`.
+"""
+from .build import build_deb, build_debs, extract_deb
+from .catalog import build_catalog, write_catalog
+from .cli import main
+from .deb import extract_control_info_from_deb, scan_deb
+from .deb822 import iter_paragraphs, parse_fields
+from .hashing import generate_hashes, hash_bytes
+from .index import PackagesIndex, generate_packages, load_repository, serialize_packages, update_packages
+from .model import PackageRecord
+from .publish import publish_indexes, write_indexes, write_release
+from .render import render_packages
+
+__all__ = [
+    "PackageRecord", "PackagesIndex", "build_catalog", "build_deb", "build_debs", "extract_control_info_from_deb",
+    "extract_deb", "generate_hashes", "generate_packages", "hash_bytes", "iter_paragraphs", "load_repository",
+    "main", "parse_fields", "publish_indexes", "render_packages", "scan_deb", "serialize_packages",
+    "update_packages", "write_catalog", "write_indexes", "write_release",
+]
@@ -0,0 +1,323 @@
+"""Đóng gói và giải nén .deb ngay trong Python (thay cho vòng lặp dpkg-deb trong debs/extract-build-deb/)."""
+import gzip
+import io
+import lzma
+import os
+import shutil
+import stat
+import tarfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .cache import MetadataCache
+from .config import BUILD_COMPRESSION, DEB_FOLDER
+from .deb import AR_HEADER_SIZE, AR_MAGIC, iter_ar_members, zstandard
+from .deb822 import parse_fields
+from .hashing import CHUNK_SIZE, THREADED_HASH_MIN, MultiHasher
+from .stats import enable_stats, record_events, stage, stats_enabled
+
+BUILD_COMPRESSIONS = ("gz", "xz", "zst", "none")
+DEFAULT_LEVELS = {"gz": 9, "xz": 6, "zst": 19}
+IGNORED_FILES = frozenset({".DS_Store"})
+# dpkg từ chối cài gói có maintainer script không chạy được
+MAINTAINER_SCRIPTS = frozenset({"preinst", "postinst", "prerm", "postrm", "config"})
+# Phần chưa nén vượt ngưỡng này sẽ được ghi ra file tạm thay vì giữ trong RAM
+SPOOL_MAX = 64 << 20
+
+
+def available_build_compressions():
+    return tuple(comp for comp in BUILD_COMPRESSIONS if comp != "zst" or zstandard is not None)
+
+
+def _build_mtime():
+    # SOURCE_DATE_EPOCH theo quy ước reproducible-builds; mặc định 0 để hai lần build luôn giống nhau
+    return int(os.environ.get("SOURCE_DATE_EPOCH", 0))
+
+
+def ar_header(name, size, mtime=0):
+    return f"{name:<16}{mtime:<12}{0:<6}{0:<6}{100644:<8}{size:<10}`\n".encode("ascii")
+
+
+class _HashingWriter:
+    """Ghi ra file .deb và đưa từng byte vào MultiHasher, để có checksum mà không phải đọc lại file."""
+
+    def __init__(self, f, hasher):
+        self._f = f
+        self._hasher = hasher
+        self.size = 0
+
+    def write(self, data):
+        self._hasher.update(data)
+        self._f.write(data)
+        self.size += len(data)
+
+
+def _open_compressor(fileobj, compression, level):
+    if compression == "gz":
+        return gzip.GzipFile(filename="", mode="wb", fileobj=fileobj, compresslevel=level, mtime=0)
+    if compression == "xz":
+        return lzma.LZMAFile(fileobj, "wb", format=lzma.FORMAT_XZ, preset=level)
+    if compression == "zst":
+        if zstandard is None:
+            raise ValueError("Cần cài gói zstandard để nén .deb bằng zst")
+        return zstandard.ZstdCompressor(level=level).stream_writer(fileobj, closefd=False)
+    return None
+
+
+def _walk_sorted(root):
+    """Duyệt cây thư mục theo thứ tự tên, trả về (đường dẫn tương đối, đường dẫn thật); bỏ qua .DS_Store."""
+    names = sorted(os.listdir(root))
+    for name in names:
+        if name in IGNORED_FILES:
+            continue
+        path = os.path.join(root, name)
+        yield name, path
+        if os.path.isdir(path) and not os.path.islink(path):
+            for rel, sub_path in _walk_sorted(path):
+                yield f"{name}/{rel}", sub_path
+
+
+def _tarinfo(arcname, path, mtime, executable=False):
+    st = os.lstat(path)
+    info = tarfile.TarInfo(arcname)
+    info.mtime = mtime
+    info.uid = info.gid = 0
+    info.uname = info.gname = "root"
+    # Giữ nguyên quyền trên đĩa (kể cả setuid/setgid) như dpkg-deb
+    info.mode = stat.S_IMODE(st.st_mode)
+    if stat.S_ISDIR(st.st_mode):
+        info.type = tarfile.DIRTYPE
+    elif stat.S_ISLNK(st.st_mode):
+        info.type = tarfile.SYMTYPE
+        info.linkname = os.readlink(path)
+        info.mode = 0o777
+    elif stat.S_ISREG(st.st_mode):
+        info.size = st.st_size
+        if executable:
+            info.mode = 0o755
+    else:
+        raise ValueError(f"Không đóng gói được {path}: chỉ hỗ trợ file, thư mục và symlink")
+    return info
+
+
+def _write_tar(root, entries, compression, level, mtime):
+    """Ghi tar (đã nén) của root và các entries ra một file tạm (trong RAM nếu nhỏ) rồi trả về file đó."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+    compressor = _open_compressor(spool, compression, level)
+    with tarfile.open(fileobj=compressor or spool, mode="w", format=tarfile.GNU_FORMAT) as tar:
+        tar.addfile(_tarinfo("./", root, mtime))
+        for rel, path, executable in entries:
+            info = _tarinfo(f"./{rel}", path, mtime, executable)
+            if info.isreg():
+                with open(path, "rb") as f:
+                    tar.addfile(info, f)
+            else:
+                tar.addfile(info)
+    if compressor is not None:
+        compressor.close()
+    spool.seek(0)
+    return spool
+
+
+def _collect_entries(src_dir):
+    control_dir = os.path.join(src_dir, "DEBIAN")
+    if not os.path.isfile(os.path.join(control_dir, "control")):
+        raise ValueError(f"Không có DEBIAN/control trong {src_dir}")
+    control_entries = [(rel, path, rel in MAINTAINER_SCRIPTS) for rel, path in _walk_sorted(control_dir)]
+    data_entries = [(rel, path, False) for rel, path in _walk_sorted(src_dir)
+                    if rel != "DEBIAN" and not rel.startswith("DEBIAN/")]
+    return control_entries, data_entries
+
+
+def build_deb(src_dir, deb_path, compression=BUILD_COMPRESSION, level=None):
+    """Đóng gói src_dir (DEBIAN/ + cây file) thành deb_path, giống `dpkg-deb --build --root-owner-group`.
+
+    Kết quả reproducible: entry sắp theo tên, mtime cố định, chủ sở hữu root:root, .DS_Store bị bỏ qua.
+    Checksum được tính ngay khi ghi. Trả về (control, hashes, size).
+    """
+    if compression not in BUILD_COMPRESSIONS:
+        raise ValueError(f"Kiểu nén không hỗ trợ: {compression}")
+    if level is None:
+        level = DEFAULT_LEVELS.get(compression)
+    mtime = _build_mtime()
+    control_entries, data_entries = _collect_entries(src_dir)
+    with open(os.path.join(src_dir, "DEBIAN", "control"), "rb") as f:
+        control = parse_fields(f.read().decode("utf-8"))
+    if not control.get("Package"):
+        raise ValueError(f"{src_dir}/DEBIAN/control thiếu trường Package")
+
+    suffix = "" if compression == "none" else f".{compression}"
+    name = os.path.basename(os.path.normpath(src_dir))
+    with stage("build-tar", name):
+        members = [("debian-binary", io.BytesIO(b"2.0\n")),
+                   (f"control.tar{suffix}", _write_tar(os.path.join(src_dir, "DEBIAN"), control_entries,
+                                                       compression, level, mtime)),
+                   (f"data.tar{suffix}", _write_tar(src_dir, data_entries, compression, level, mtime))]
+    sizes = [member.seek(0, io.SEEK_END) for _, member in members]
+    total = len(AR_MAGIC) + sum(AR_HEADER_SIZE + size + size % 2 for size in sizes)
+
+    hasher = MultiHasher(threaded=total >= THREADED_HASH_MIN)
+    tmp_path = f"{deb_path}.tmp"
+    try:
+        with stage("build-ar", name, total), open(tmp_path, "wb") as f:
+            out = _HashingWriter(f, hasher)
+            out.write(AR_MAGIC)
+            for (member_name, member), size in zip(members, sizes):
+                out.write(ar_header(member_name, size, mtime))
+                member.seek(0)
+                while True:
+                    chunk = member.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                if size % 2:
+                    out.write(b"\n")
+                member.close()
+        os.replace(tmp_path, deb_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return control, hasher.hexdigests(), out.size
+
+
+def _build_deb_worker(src_dir, deb_path, compression, level, collect_stats):
+    stats = enable_stats() if collect_stats else None
+    result = build_deb(src_dir, deb_path, compression, level)
+    return result, stats.events if stats else []
+
+
+def list_build_sources(input_dir):
+    return [os.path.join(input_dir, name) for name in sorted(os.listdir(input_dir))
+            if os.path.isdir(os.path.join(input_dir, name))]
+
+
+def build_debs(src_dirs, output_dir, compression=BUILD_COMPRESSION, level=None, jobs=1):
+    """Đóng gói nhiều thư mục (song song nếu jobs > 1) thành output_dir/<tên thư mục>.deb.
+
+    Nếu output_dir là debs/ thì control + checksum vừa tính được ghi thẳng vào cache của
+    index, lần chạy index kế tiếp không phải đọc lại các .deb này.
+    Trả về ({deb_path: (control, hashes, size)}, danh sách (thư mục, lỗi)).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = {src_dir: os.path.join(output_dir, f"{os.path.basename(os.path.normpath(src_dir))}.deb")
+             for src_dir in src_dirs}
+    results = {}
+    failures = []
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_build_deb_worker, src_dir, deb_path, compression, level, stats_enabled()): src_dir
+                       for src_dir, deb_path in tasks.items()}
+            for future in as_completed(futures):
+                src_dir = futures[future]
+                try:
+                    results[tasks[src_dir]], events = future.result()
+                    record_events(events)
+                except Exception as e:
+                    failures.append((src_dir, e))
+    else:
+        for src_dir, deb_path in tasks.items():
+            try:
+                results[deb_path] = build_deb(src_dir, deb_path, compression, level)
+            except Exception as e:
+                failures.append((src_dir, e))
+
+    if os.path.abspath(output_dir) == os.path.abspath(DEB_FOLDER):
+        cache = MetadataCache()
+        for deb_path, (control, hashes, _) in results.items():
+            # Khóa cache giống list_debs() để index nhận ra đúng file
+            cache.store(os.path.join(DEB_FOLDER, os.path.basename(deb_path)), control, hashes)
+        cache.save()
+    ordered = {deb_path: results[deb_path] for deb_path in tasks.values() if deb_path in results}
+    return ordered, sorted(failures, key=lambda item: item[0])
+
+
+class _MemberReader:
+    """Đọc tuần tự đúng size byte của một member ar, để tarfile giải nén data.tar theo luồng."""
+
+    def __init__(self, f, size):
+        self._f = f
+        self._remaining = size
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+def _check_member(member, dest_dir):
+    """Chặn member ghi ra ngoài dest_dir: đường dẫn tuyệt đối, "..", hoặc đi qua symlink trỏ ra ngoài.
+
+    Khác filter "data" của tarfile, symlink tuyệt đối (vd. -> /var/jb/...) vẫn được giữ
+    vì nó trỏ vào hệ thống của máy cài gói chứ không phải máy đang giải nén.
+    """
+    if member.name.startswith("/") or ".." in member.name.split("/"):
+        raise ValueError(f"Đường dẫn không hợp lệ trong gói: {member.name}")
+    if member.islnk() and (member.linkname.startswith("/") or ".." in member.linkname.split("/")):
+        raise ValueError(f"Hard link trỏ ra ngoài gói: {member.name} -> {member.linkname}")
+    root = os.path.realpath(dest_dir)
+    target = os.path.join(dest_dir, member.name)
+    parent = os.path.realpath(os.path.dirname(target))
+    if os.path.commonpath([root, parent]) != root:
+        raise ValueError(f"{member.name} nằm sau một symlink trỏ ra ngoài {dest_dir}")
+    if os.path.islink(target):
+        if member.isdir():
+            raise ValueError(f"{member.name} vừa là symlink vừa là thư mục")
+        # Không ghi xuyên qua symlink cũ; thay nó bằng member mới như dpkg
+        os.unlink(target)
+
+
+def _extract_member(name, reader, dest_dir):
+    """Giải nén một control.tar/data.tar theo luồng, giống `dpkg-deb -x`.
+
+    Quyền được giữ nguyên (kể cả setuid/setgid); quyền của thư mục được đặt sau
+    cùng để thư mục chỉ đọc không chặn các file bên trong.
+    """
+    if name.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError(f"Cần cài gói zstandard để giải nén {name}")
+        reader = zstandard.ZstdDecompressor().stream_reader(reader)
+    # Đã tự kiểm tra từng member nên tắt filter mặc định (nó bỏ setuid và symlink tuyệt đối)
+    options = {"filter": "fully_trusted"} if hasattr(tarfile, "fully_trusted_filter") else {}
+    directories = []
+    with tarfile.open(fileobj=reader, mode="r|*") as tar:
+        for member in tar:
+            _check_member(member, dest_dir)
+            if member.isdir():
+                directories.append(member)
+            tar.extract(member, dest_dir, set_attrs=not member.isdir(), **options)
+        for member in reversed(directories):
+            path = os.path.join(dest_dir, member.name)
+            tar.chown(member, path, False)
+            tar.utime(member, path)
+            tar.chmod(member, path)
+
+
+def extract_deb(deb_path, dest_dir):
+    """Giải nén control vào dest_dir/DEBIAN và data vào dest_dir, giống `dpkg-deb -e` + `dpkg-deb -x`.
+
+    Nếu lỗi giữa chừng thì xóa dest_dir (khi nó do lần gọi này tạo ra), không để lại cây giải nén dở.
+    """
+    created = not os.path.exists(dest_dir)
+    control_dir = os.path.join(dest_dir, "DEBIAN")
+    os.makedirs(control_dir, exist_ok=True)
+    found = set()
+    try:
+        with open(deb_path, "rb") as f:
+            for name, _, size in iter_ar_members(f):
+                kind = name.split(".", 1)[0]
+                if kind not in ("control", "data") or not name.startswith(f"{kind}.tar"):
+                    continue
+                with stage("extract", f"{os.path.basename(deb_path)}:{name}", size):
+                    _extract_member(name, _MemberReader(f, size), control_dir if kind == "control" else dest_dir)
+                found.add(kind)
+        missing = {"control", "data"} - found
+        if missing:
+            raise ValueError(f"{deb_path} thiếu {', '.join(sorted(missing))}.tar")
+    except BaseException:
+        if created:
+            shutil.rmtree(dest_dir, ignore_errors=True)
+        raise
+    return dest_dir
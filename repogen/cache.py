@@ -0,0 +1,71 @@
+"""Cache control + checksum của các .deb giữa các lần chạy."""
+import json
+import os
+
+from .config import CACHE_FILE, CACHE_VERSION
+from .stats import stage
+
+
+class MetadataCache:
+    """Cache control + checksum của từng .deb, khóa theo (size, mtime, inode).
+
+    Lưu thành file JSON cạnh repo. Gói không đổi được lấy thẳng từ cache,
+    gói đã bị xóa khỏi debs/ sẽ bị loại ở prune().
+    """
+
+    def __init__(self, path=CACHE_FILE, use_existing=True):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._seen = set()
+        self._dirty = False
+        if use_existing:
+            self._load()
+
+    def _load(self):
+        try:
+            with stage("cache-load"), open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self._entries = data.get("entries", {})
+
+    @staticmethod
+    def _signature(deb_path):
+        st = os.stat(deb_path)
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def lookup(self, deb_path: str):
+        """Trả về (control, hashes) nếu file chưa đổi kể từ lần cache, ngược lại None."""
+        # ./debs/x.deb và debs/x.deb là cùng một file, cùng một khóa
+        deb_path = os.path.normpath(deb_path)
+        self._seen.add(deb_path)
+        entry = self._entries.get(deb_path)
+        if entry is not None and entry["stat"] == self._signature(deb_path):
+            return entry["control"], entry["hashes"]
+        return None
+
+    def store(self, deb_path: str, control, hashes):
+        deb_path = os.path.normpath(deb_path)
+        self._entries[deb_path] = {"stat": self._signature(deb_path), "control": control, "hashes": hashes}
+        self._dirty = True
+
+    def forget(self, deb_path: str):
+        if self._entries.pop(os.path.normpath(deb_path), None) is not None:
+            self._dirty = True
+
+    def prune(self):
+        for path in set(self._entries) - self._seen:
+            del self._entries[path]
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with stage("cache-save"), open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
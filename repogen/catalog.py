@@ -0,0 +1,151 @@
+"""Catalogue JSON và chỉ mục tìm kiếm tĩnh (catalog/) cho website, dựng từ nội dung Packages."""
+import gzip
+import json
+import os
+import re
+import unicodedata
+
+from .config import BASE_URL, CATALOG_FILE, CATALOG_SEARCH_FOLDER, CATALOG_VERSION
+from .deb822 import compare_versions, description_text, iter_paragraphs
+from .files import write_if_changed
+from .images import package_screenshots
+from .model import package_short_dir
+from .render import load_overrides
+from .stats import stage
+
+try:
+    import brotli
+except ImportError:  # tùy chọn: thêm bản .br cạnh bản .gz
+    brotli = None
+
+# Thứ tự cột của mỗi gói trong catalog/packages.json
+CATALOG_FIELDS = ("id", "name", "version", "section", "author", "summary", "depiction", "sileo_depiction", "thumb")
+SEARCH_FIELDS = ("Name", "Package", "Author", "Section", "Description")
+# Từ khóa ngắn hơn 3 ký tự tra bảng tiền tố (1-2 ký tự đầu của từ), dài hơn thì tra trigram
+PREFIX_LENGTH = 2
+TRIGRAM = 3
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Chữ thường, bỏ dấu tiếng Việt (kể cả đ) để "dien" tìm được "Diễn"."""
+    text = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: str):
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def index_keys(token: str):
+    """Các khóa chỉ mục của một từ: tiền tố 1..PREFIX_LENGTH ký tự và mọi trigram."""
+    keys = {token[:n] for n in range(1, min(PREFIX_LENGTH, len(token)) + 1)}
+    keys.update(token[i:i + TRIGRAM] for i in range(len(token) - TRIGRAM + 1))
+    return keys
+
+
+def shard_name(key: str) -> str:
+    # Trình duyệt chỉ tải các shard ứng với ký tự đầu của khóa cần tra
+    return key[0]
+
+
+def _site_path(url):
+    # Depiction trỏ về chính site này thì đổi sang đường dẫn tương đối
+    prefix = BASE_URL + "/"
+    return url[len(prefix):] if url.startswith(prefix) else url
+
+
+def _latest_packages(packages_text):
+    """Mỗi Package ID một stanza: bản có Version lớn nhất."""
+    latest = {}
+    for fields in iter_paragraphs(packages_text):
+        package = fields.get("Package")
+        if not package:
+            continue
+        current = latest.get(package)
+        if current is None or compare_versions(fields.get("Version", "0"), current.get("Version", "0")) > 0:
+            latest[package] = fields
+    return sorted(latest.values(), key=lambda fields: (fields.get("Name", fields["Package"]).lower(), fields["Package"]))
+
+
+def _catalog_row(fields):
+    description = description_text(fields.get("Description", ""))
+    short_dir = package_short_dir(os.path.basename(fields.get("Filename", "")))
+    screenshots = package_screenshots(short_dir, load_overrides(short_dir)) if short_dir else []
+    return [
+        fields["Package"],
+        fields.get("Name", fields["Package"]),
+        fields.get("Version", ""),
+        fields.get("Section", ""),
+        fields.get("Author", ""),
+        description.partition("\n")[0],
+        _site_path(fields.get("Depiction", "")),
+        _site_path(fields.get("SileoDepiction", "")),
+        _site_path(screenshots[0][1]) if screenshots else "",
+    ]
+
+
+def build_catalog(packages_text: str):
+    """Dựng (catalogue, {tên shard: {khóa: [chỉ số gói]}}) từ nội dung Packages.
+
+    Chỉ số gói là vị trí trong catalogue["packages"]. Client lấy giao của các danh sách
+    ứng với khóa của từng từ trong truy vấn, rồi tự so khớp lại trên catalogue.
+    """
+    packages = _latest_packages(packages_text)
+    rows = []
+    sections = {}
+    postings = {}
+    for doc_id, fields in enumerate(packages):
+        rows.append(_catalog_row(fields))
+        sections.setdefault(fields.get("Section", ""), []).append(doc_id)
+        text = " ".join(description_text(fields[name]) for name in SEARCH_FIELDS if name in fields)
+        for token in set(tokenize(text)):
+            for key in index_keys(token):
+                postings.setdefault(key, set()).add(doc_id)
+
+    shards = {}
+    for key in sorted(postings):
+        shards.setdefault(shard_name(key), {})[key] = sorted(postings[key])
+    catalog = {
+        "version": CATALOG_VERSION,
+        "fields": list(CATALOG_FIELDS),
+        "packages": rows,
+        "sections": dict(sorted(sections.items())),
+        "search": {"prefix": PREFIX_LENGTH, "ngram": TRIGRAM, "shards": sorted(shards)},
+    }
+    return catalog, shards
+
+
+def _dump(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_precompressed(path, data: bytes) -> bool:
+    """Ghi file cùng bản .gz (và .br nếu có brotli) để web server gửi thẳng bản nén."""
+    changed = write_if_changed(path, data)
+    variants = [(".gz", lambda: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda: brotli.compress(data, quality=11)))
+    for suffix, compress in variants:
+        if changed or not os.path.exists(path + suffix):
+            write_if_changed(path + suffix, compress())
+    return changed
+
+
+def write_catalog(packages_data: bytes):
+    """Ghi catalog/packages.json và catalog/search/<shard>.json (kèm bản nén); trả về số file thay đổi."""
+    with stage("catalog", nbytes=len(packages_data)):
+        catalog, shards = build_catalog(packages_data.decode("utf-8"))
+        os.makedirs(CATALOG_SEARCH_FOLDER, exist_ok=True)
+        changed = _write_precompressed(CATALOG_FILE, _dump(catalog))
+        for name, keys in shards.items():
+            changed += _write_precompressed(os.path.join(CATALOG_SEARCH_FOLDER, f"{name}.json"), _dump(keys))
+        # Xóa shard không còn khóa nào (cùng các bản nén của nó)
+        for filename in os.listdir(CATALOG_SEARCH_FOLDER):
+            if filename.split(".", 1)[0] not in shards:
+                os.remove(os.path.join(CATALOG_SEARCH_FOLDER, filename))
+                changed += 1
+    if changed:
+        print(f"🔎 Đã ghi catalogue {len(catalog['packages'])} gói và {len(shards)} shard tìm kiếm vào "
+              f"{os.path.dirname(CATALOG_FILE)}/")
+    return changed
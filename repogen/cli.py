@@ -0,0 +1,319 @@
+"""Dòng lệnh: python3 -m repogen <lệnh> (gen.py là lối tắt cho cùng các lệnh này)."""
+import argparse
+import os
+import sys
+import tarfile
+
+from .build import BUILD_COMPRESSIONS, available_build_compressions, build_debs, extract_deb, list_build_sources
+from .catalog import write_catalog
+from .config import (BUILD_COMPRESSION, BUILD_OUTPUT_FOLDER, BUILD_SOURCE_FOLDER, DEB_FOLDER, MIRROR_CONFIG,
+                     PACKAGES_FILE, PDIFF_HISTORY, PDIFF_INDEX, WATCH_DEBOUNCE, WATCH_POLL_INTERVAL)
+from .images import optimize_images, update_featured_banners
+from .index import generate_packages, load_repository, update_packages
+from .mirror import mirror
+from .publish import INDEX_FORMATS, available_index_formats, publish_indexes, read_published_indexes, write_release
+from .render import render_packages
+from .stats import enable_stats, stage
+from .verify import verify_indexes, verify_packages
+from .watch import watch
+
+COMMANDS = ("index", "compress", "render", "release", "verify", "watch", "mirror", "build", "extract", "catalog")
+DEFAULT_COMMAND = "index"
+
+
+def parse_level(value):
+    fmt, _, level = value.partition("=")
+    if fmt not in INDEX_FORMATS or not level.isdigit():
+        raise argparse.ArgumentTypeError(f"Mức nén không hợp lệ: {value} (ví dụ: xz=9)")
+    return fmt, int(level)
+
+
+def parse_formats(value):
+    formats = [fmt.strip() for fmt in value.split(",") if fmt.strip()]
+    for fmt in formats:
+        if fmt not in INDEX_FORMATS:
+            raise argparse.ArgumentTypeError(f"Định dạng không hỗ trợ: {fmt}")
+        if fmt not in available_index_formats():
+            raise argparse.ArgumentTypeError("Cần cài gói zstandard để tạo Packages.zst")
+    return formats
+
+
+def parse_compression(value):
+    if value not in BUILD_COMPRESSIONS:
+        raise argparse.ArgumentTypeError(f"Kiểu nén không hỗ trợ: {value} (chọn {', '.join(BUILD_COMPRESSIONS)})")
+    if value not in available_build_compressions():
+        raise argparse.ArgumentTypeError("Cần cài gói zstandard để nén .deb bằng zst")
+    return value
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--stats", action="store_true",
+                        help="In thời gian, dung lượng và RSS đỉnh của process (getrusage) sau từng bước, "
+                             "cùng các gói chậm nhất")
+    common.add_argument("--trace-malloc", action="store_true",
+                        help="Cột bộ nhớ của --stats đo heap Python đỉnh của từng bước bằng tracemalloc "
+                             "(chậm hơn đáng kể, không tính bộ nhớ ngoài Python như Pillow/lzma)")
+    common.add_argument("--trace", metavar="FILE", help="Ghi các bước ra FILE dạng Chrome trace-event JSON")
+    common.add_argument("--profile", metavar="FILE",
+                        help="Chạy dưới cProfile và ghi kết quả ra FILE (xem bằng pstats/snakeviz)")
+
+    scan = argparse.ArgumentParser(add_help=False)
+    scan.add_argument("--rebuild", action="store_true", help="Bỏ qua cache, đọc lại toàn bộ .deb")
+    scan.add_argument("--check-hash", action="store_true", help="Kiểm tra lại SHA256 kể cả khi cache còn khớp")
+    scan.add_argument("-j", "--jobs", type=int, default=1, help="Số process xử lý .deb song song (mặc định 1)")
+
+    publish = argparse.ArgumentParser(add_help=False)
+    publish.add_argument("--level", type=parse_level, action="append", default=[], metavar="ĐỊNH_DẠNG=MỨC",
+                         help="Mức nén cho từng định dạng, ví dụ --level xz=9 --level zst=22")
+    publish.add_argument("--formats", type=parse_formats, default=None,
+                         help=f"Các định dạng nén cần tạo, mặc định: {','.join(INDEX_FORMATS)} (zst khi có zstandard)")
+    publish.add_argument("--pdiff", action="store_true", help="Tạo patch Packages.diff/ so với Packages hiện có")
+    publish.add_argument("--pdiff-history", type=int, default=PDIFF_HISTORY,
+                         help=f"Số patch Packages.diff giữ lại (mặc định {PDIFF_HISTORY})")
+
+    parser = argparse.ArgumentParser(prog="gen.py", description="Tạo Packages, depiction và HTML cho repo",
+                                     epilog=f"Không ghi lệnh thì mặc định là '{DEFAULT_COMMAND}'.")
+    commands = parser.add_subparsers(dest="command", metavar="LỆNH")
+
+    index = commands.add_parser("index", parents=[common, scan, publish],
+                                help="Chạy đầy đủ: ảnh, trang gói, Packages, bản nén và Release")
+    index.add_argument("--only", action="append", default=[], metavar="DEB|PACKAGE",
+                       help="Chỉ cập nhật stanza của .deb hoặc Package ID này trong Packages hiện có")
+    index.add_argument("--no-images", action="store_true",
+                       help="Bỏ qua bước tạo thumbnail cho images/ và banner/")
+    index.add_argument("--image-jobs", type=int, default=os.cpu_count() or 1,
+                       help="Số process tạo thumbnail song song (mặc định: số CPU)")
+
+    commands.add_parser("compress", parents=[common, scan, publish],
+                        help="Dựng lại Packages từ debs/ (qua cache) rồi ghi các bản nén và Release, không tạo trang")
+
+    render = commands.add_parser("render", parents=[common, scan],
+                                 help="Chỉ tạo lại depiction/HTML, không đụng tới Packages")
+    render.add_argument("debs", nargs="*", metavar="DEB", help="Các .deb cần tạo trang (mặc định: mọi gói trong debs/)")
+    render.add_argument("--depiction-only", action="store_true", help="Chỉ tạo depiction.json")
+
+    commands.add_parser("release", parents=[common],
+                        help="Tạo lại Release và by-hash/ từ Packages và các bản nén đang có")
+    verify = commands.add_parser("verify", parents=[common],
+                                 help="Kiểm tra Packages.txt, các bản nén, Release và các .deb có khớp với Packages không")
+    verify.add_argument("--check-hash", action="store_true",
+                        help="Hash lại mọi .deb kể cả khi cache còn khớp")
+    verify.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Số process hash .deb song song (mặc định: số CPU)")
+
+    watch_parser = commands.add_parser("watch", parents=[common, publish],
+                                       help="Chạy liên tục và cập nhật index khi debs/, descriptions/, images/ thay đổi")
+    watch_parser.add_argument("--check-hash", action="store_true",
+                              help="Kiểm tra lại SHA256 kể cả khi cache còn khớp")
+    watch_parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE,
+                              help=f"Số giây chờ hết loạt thay đổi (mặc định {WATCH_DEBOUNCE})")
+    watch_parser.add_argument("--poll-interval", type=float, default=WATCH_POLL_INTERVAL,
+                              help=f"Chu kỳ polling khi không có watchdog (mặc định {WATCH_POLL_INTERVAL})")
+
+    mirror_parser = commands.add_parser("mirror", parents=[common, publish],
+                                        help="Tải gói mới từ các repo upstream trong mirrors.json rồi gộp vào index")
+    mirror_parser.add_argument("--config", default=MIRROR_CONFIG,
+                               help=f"File cấu hình upstream (mặc định {MIRROR_CONFIG})")
+    mirror_parser.add_argument("-j", "--jobs", type=int, default=4, help="Số .deb tải song song (mặc định 4)")
+
+    build = commands.add_parser("build", parents=[common, publish],
+                                help="Đóng gói lại các thư mục đã giải nén thành .deb (thay cho build_deb.sh)")
+    build.add_argument("sources", nargs="*", metavar="THƯ_MỤC",
+                       help="Các thư mục gói (chứa DEBIAN/control), mặc định: mọi thư mục trong --input")
+    build.add_argument("--input", default=BUILD_SOURCE_FOLDER,
+                       help=f"Thư mục chứa các gói cần build (mặc định {BUILD_SOURCE_FOLDER})")
+    build.add_argument("-o", "--output", default=None,
+                       help=f"Thư mục ghi .deb (mặc định {BUILD_OUTPUT_FOLDER}, hoặc {DEB_FOLDER}/ khi có --index)")
+    build.add_argument("--compression", type=parse_compression, default=BUILD_COMPRESSION,
+                       help=f"Nén control.tar/data.tar: {', '.join(BUILD_COMPRESSIONS)} (mặc định {BUILD_COMPRESSION})")
+    build.add_argument("--compression-level", type=int, default=None, metavar="MỨC",
+                       help="Mức nén (mặc định: gz=9, xz=6, zst=19)")
+    build.add_argument("--index", action="store_true",
+                       help=f"Ghi thẳng vào {DEB_FOLDER}/ rồi cập nhật Packages bằng control/checksum vừa tính")
+    build.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                       help="Số gói build song song (mặc định: số CPU)")
+
+    extract = commands.add_parser("extract", parents=[common],
+                                  help="Giải nén .deb thành thư mục DEBIAN/ + cây file (thay cho extract-deb.sh)")
+    extract.add_argument("debs", nargs="+", metavar="DEB", help="Các .deb cần giải nén")
+    extract.add_argument("-o", "--output", default=BUILD_SOURCE_FOLDER,
+                         help=f"Giải nén vào <output>/<tên .deb> (mặc định {BUILD_SOURCE_FOLDER})")
+
+    commands.add_parser("catalog", parents=[common],
+                        help="Tạo lại catalogue và chỉ mục tìm kiếm của website (catalog/) từ Packages hiện có")
+    return parser
+
+
+def _read_packages():
+    if not os.path.exists(PACKAGES_FILE):
+        return None
+    with open(PACKAGES_FILE, "rb") as f:
+        return f.read()
+
+
+def cmd_index(args):
+    old_packages = _read_packages()
+    if not args.no_images:
+        with stage("images"):
+            optimize_images(jobs=args.image_jobs)
+    if args.only and old_packages is not None:
+        packages_data, failures = update_packages(args.only, check_hash=args.check_hash, rebuild=args.rebuild,
+                                                   jobs=args.jobs)
+    else:
+        packages_data, failures = generate_packages(rebuild=args.rebuild, check_hash=args.check_hash, jobs=args.jobs)
+    publish_indexes(packages_data, old_packages, dict(args.level), args.formats, args.pdiff, args.pdiff_history)
+    if not args.no_images:
+        update_featured_banners()
+    return 1 if failures else 0
+
+
+def cmd_compress(args):
+    old_packages = _read_packages()
+    packages_data, failures = generate_packages(rebuild=args.rebuild, check_hash=args.check_hash, jobs=args.jobs,
+                                                render=False)
+    publish_indexes(packages_data, old_packages, dict(args.level), args.formats, args.pdiff, args.pdiff_history)
+    return 1 if failures else 0
+
+
+def cmd_render(args):
+    deb_paths = args.debs or None
+    packages, failures = load_repository(deb_paths, rebuild=args.rebuild, check_hash=args.check_hash, jobs=args.jobs)
+    render_packages(packages, depiction_only=args.depiction_only)
+    return 1 if failures else 0
+
+
+def cmd_release(args):
+    outputs = read_published_indexes()
+    if PACKAGES_FILE not in outputs:
+        print(f"❌ Chưa có file {PACKAGES_FILE}, hãy chạy lệnh index hoặc compress trước")
+        return 1
+    extra_files = {}
+    if os.path.exists(PDIFF_INDEX):
+        with open(PDIFF_INDEX, "rb") as f:
+            extra_files[PDIFF_INDEX] = f.read()
+    write_release(outputs, extra_files)
+    return 0
+
+
+def cmd_catalog(args):
+    packages_data = _read_packages()
+    if packages_data is None:
+        print(f"❌ Chưa có file {PACKAGES_FILE}, hãy chạy lệnh index hoặc compress trước")
+        return 1
+    write_catalog(packages_data)
+    return 0
+
+
+def cmd_verify(args):
+    problems = verify_indexes() + verify_packages(jobs=args.jobs, check_hash=args.check_hash)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return 1
+    print(f"✅ {PACKAGES_FILE}, các bản nén, Release và các .deb trong {DEB_FOLDER}/ khớp nhau")
+    return 0
+
+
+def cmd_watch(args):
+    watch(levels=dict(args.level), formats=args.formats, pdiff=args.pdiff, pdiff_history=args.pdiff_history,
+          check_hash=args.check_hash, debounce=args.debounce, poll_interval=args.poll_interval)
+    return 0
+
+
+def cmd_mirror(args):
+    if not os.path.exists(args.config):
+        print(f"❌ Không có {args.config}; ví dụ: "
+              '{"upstreams": [{"url": "https://repo.example.com/", "packages": ["com.example.tweak"]}]}')
+        return 1
+    downloaded, removed, failures = mirror(args.config, jobs=args.jobs)
+    if downloaded or removed:
+        old_packages = _read_packages()
+        if old_packages is not None:
+            packages_data, index_failures = update_packages(downloaded + removed)
+        else:
+            packages_data, index_failures = generate_packages()
+        failures += index_failures
+        publish_indexes(packages_data, old_packages, dict(args.level), args.formats, args.pdiff, args.pdiff_history)
+    return 1 if failures else 0
+
+
+def cmd_build(args):
+    output = args.output or (DEB_FOLDER if args.index else BUILD_OUTPUT_FOLDER)
+    if args.index and os.path.abspath(output) != os.path.abspath(DEB_FOLDER):
+        print(f"❌ --index chỉ dùng được khi ghi vào {DEB_FOLDER}/")
+        return 1
+    sources = args.sources or list_build_sources(args.input)
+    if not sources:
+        print(f"❌ Không có thư mục gói nào trong {args.input}")
+        return 1
+    built, failures = build_debs(sources, output, args.compression, args.compression_level, args.jobs)
+    for deb_path, (control, _, size) in built.items():
+        print(f"📦 {deb_path}: {control['Package']} {control.get('Version', '')} ({size} byte)")
+    for src_dir, error in failures:
+        print(f"❌ {src_dir}: {error}")
+    if args.index and built:
+        old_packages = _read_packages()
+        if old_packages is not None:
+            packages_data, index_failures = update_packages(list(built))
+        else:
+            packages_data, index_failures = generate_packages()
+        failures += index_failures
+        publish_indexes(packages_data, old_packages, dict(args.level), args.formats, args.pdiff, args.pdiff_history)
+    print(f"🏁 Đã build {len(built)} gói vào {output}/, lỗi {len(failures)}")
+    return 1 if failures else 0
+
+
+def cmd_extract(args):
+    failures = 0
+    for deb_path in args.debs:
+        dest = os.path.join(args.output, os.path.splitext(os.path.basename(deb_path))[0])
+        try:
+            extract_deb(deb_path, dest)
+        except (OSError, ValueError, tarfile.TarError) as e:
+            print(f"❌ {deb_path}: {e}")
+            failures += 1
+            continue
+        print(f"✅ Đã giải nén {deb_path} → {dest}")
+    return 1 if failures else 0
+
+
+HANDLERS = {
+    "index": cmd_index,
+    "compress": cmd_compress,
+    "render": cmd_render,
+    "release": cmd_release,
+    "verify": cmd_verify,
+    "watch": cmd_watch,
+    "mirror": cmd_mirror,
+    "build": cmd_build,
+    "extract": cmd_extract,
+    "catalog": cmd_catalog,
+}
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # `gen.py --rebuild` vẫn chạy như trước khi có lệnh con: mặc định là index
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, DEFAULT_COMMAND)
+    args = build_parser().parse_args(argv)
+
+    stats = enable_stats(args.trace_malloc) if args.stats or args.trace else None
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return HANDLERS[args.command](args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"🧭 Đã ghi cProfile vào {args.profile}")
+        if stats is not None:
+            if args.stats:
+                stats.summary()
+            if args.trace:
+                stats.write_trace(args.trace)
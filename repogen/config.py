@@ -0,0 +1,59 @@
+"""Đường dẫn, URL và các hằng số cấu hình của repo (mọi đường dẫn tính từ thư mục gốc repo)."""
+import os
+
+DEB_FOLDER = "debs"
+OUTPUT_FILE = "Packages.txt"
+PACKAGES_FILE = "Packages"
+BZIP_FILE = "Packages.bz2"
+DESCRIPTION_FOLDER = "descriptions"
+IMAGE_FOLDER = "images"  # Thêm hằng số cho thư mục ảnh
+ICON_PATH = "file:///var/jb/Library/IconRepo/tinhchinh-dn.png"
+BASE_URL = "https://nhdien07122012.github.io/repo"
+SPONSOR ="Diễn Nguyễn"
+RELEASE_FILE = "Release"
+BY_HASH_FOLDER = "by-hash"
+# APT tải by-hash theo thuật toán mạnh nhất có trong Release (SHA512), nên phải có cả hai cây
+BY_HASH_ALGORITHMS = ("SHA256", "SHA512")
+# Dùng khi chưa có file Release, các trường này vẫn có thể sửa tay trong Release
+RELEASE_DEFAULTS = {
+    "Origin": "Diễn Nguyễn Repo👨🏻‍💻",
+    "Label": "Diễn Nguyễn Repo👨🏻‍💻",
+    "Suite": "stable",
+    "Version": "1.0",
+    "Codename": "ios",
+    "Architectures": "iphoneos-arm iphoneos-arm64 iphoneos-arm64e",
+    "Components": "main",
+    "Description": "Đây là kho lưu trữ các tinh chỉnh và gói iOS do Diễn Nguyễn quản lý.",
+}
+PDIFF_FOLDER = "Packages.diff"
+PDIFF_INDEX = f"{PDIFF_FOLDER}/Index"
+PDIFF_HISTORY = 20
+BANNER_FOLDER = "banner"
+FEATURED_FILE = "sileo-featured.json"
+IMAGE_OUTPUT_FOLDER = "optimized"
+IMAGE_MANIFEST = os.path.join(IMAGE_OUTPUT_FOLDER, "manifest.json")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+# Khung thumbnail (rộng, cao): ảnh chụp hiển thị 210px trong HTML, banner Sileo 265x150, đều lấy 2x
+IMAGE_SOURCE_FOLDERS = {IMAGE_FOLDER: (420, 910), BANNER_FOLDER: (530, 300)}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+TEMPLATE_FOLDER = "templates"
+DEPICTION_TEMPLATE = "depiction.json"
+HTML_TEMPLATE = "description.html"
+OVERRIDES_FILE = "overrides.json"
+WATCH_FOLDERS = (DEB_FOLDER, DESCRIPTION_FOLDER, IMAGE_FOLDER)
+WATCH_DEBOUNCE = 0.5
+WATCH_POLL_INTERVAL = 1.0
+MIRROR_CONFIG = "mirrors.json"
+MIRROR_STATE_FILE = ".mirror-state.json"
+MIRROR_STATE_VERSION = 1
+MIRROR_TIMEOUT = 30
+CACHE_FILE = ".gen-cache.json"
+CACHE_VERSION = 2
+BUILD_SOURCE_FOLDER = os.path.join(DEB_FOLDER, "extract-build-deb", "final")
+BUILD_OUTPUT_FOLDER = os.path.join(DEB_FOLDER, "extract-build-deb", "output_debs")
+BUILD_COMPRESSION = "xz"
+CATALOG_FOLDER = "catalog"
+CATALOG_FILE = os.path.join(CATALOG_FOLDER, "packages.json")
+CATALOG_SEARCH_FOLDER = os.path.join(CATALOG_FOLDER, "search")
+CATALOG_VERSION = 1
@@ -0,0 +1,83 @@
+"""Đọc .deb: duyệt member ar, lấy file control và checksum trong một lượt đọc."""
+import io
+import os
+import tarfile
+from typing import Dict
+
+from .deb822 import parse_fields
+from .hashing import THREADED_HASH_MIN, DigestReader, MultiHasher
+from .stats import stage
+
+try:
+    import zstandard
+except ImportError:  # tùy chọn: đọc control.tar.zst
+    zstandard = None
+
+AR_MAGIC = b"!<arch>\n"
+AR_HEADER_SIZE = 60
+# Thứ tự ưu tiên các member control trong .deb
+CONTROL_MEMBERS = ("control.tar.gz", "control.tar.xz", "control.tar.bz2", "control.tar.zst", "control.tar")
+
+
+def iter_ar_members(f):
+    """Duyệt header các member trong file ar, trả về (tên, offset, size).
+
+    Chỉ đọc header 60 byte rồi seek() qua phần dữ liệu, nên không phụ thuộc
+    vào kích thước của data.tar.
+    """
+    if f.read(len(AR_MAGIC)) != AR_MAGIC:
+        raise ValueError("File không phải định dạng ar/.deb hợp lệ")
+    while True:
+        header = f.read(AR_HEADER_SIZE)
+        if len(header) < AR_HEADER_SIZE:
+            return
+        name = header[0:16].decode("utf-8").strip()
+        size = int(header[48:58].decode("utf-8").strip())
+        if name.endswith("/"):
+            name = name[:-1]
+        offset = f.tell()
+        yield name, offset, size
+        f.seek(offset + size + (size % 2))
+
+
+def _open_control_tar(member_name, data):
+    if member_name.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError("Cần cài gói zstandard để đọc control.tar.zst")
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+        return tarfile.open(fileobj=reader, mode="r|")
+    return tarfile.open(fileobj=io.BytesIO(data), mode="r|*")
+
+
+def read_control_from_fileobj(f) -> Dict[str, str]:
+    for name, offset, size in iter_ar_members(f):
+        if name not in CONTROL_MEMBERS:
+            continue
+        # control.tar chỉ vài KB nên đọc riêng member này là đủ
+        data = f.read(size)
+        with stage("control-tar", nbytes=size), _open_control_tar(name, data) as tar:
+            for member in tar:
+                if os.path.basename(member.name) == "control":
+                    return parse_fields(tar.extractfile(member).read().decode("utf-8"))
+        break
+    raise ValueError("Không tìm thấy file control trong .deb")
+
+
+def extract_control_info_from_deb(deb_path: str) -> Dict[str, str]:
+    with open(deb_path, "rb") as f:
+        return read_control_from_fileobj(f)
+
+
+def scan_deb(deb_path: str):
+    """Đọc control và tính checksum của .deb trong cùng một lượt đọc file."""
+    size = os.path.getsize(deb_path)
+    package = os.path.basename(deb_path)
+    hasher = MultiHasher(threaded=size >= THREADED_HASH_MIN)
+    with open(deb_path, "rb") as f:
+        reader = DigestReader(f, hasher)
+        with stage("control", package):
+            control = read_control_from_fileobj(reader)
+        with stage("hash", package, size - reader.tell()):
+            reader.drain()
+            digests = hasher.hexdigests()
+    return control, digests
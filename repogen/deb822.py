@@ -0,0 +1,116 @@
+"""Đọc định dạng deb822 (control, Packages, Release), kể cả trường gập nhiều dòng, và so sánh phiên bản dpkg."""
+from typing import Dict, Iterator
+
+
+def parse_fields(text: str) -> Dict[str, str]:
+    """Đọc một đoạn deb822 thành dict tên trường -> giá trị.
+
+    Dòng bắt đầu bằng khoảng trắng là phần tiếp của trường trước: được nối vào bằng "\\n"
+    và giữ nguyên khoảng trắng đầu dòng, nên ghi lại `Tên: giá trị` là ra đúng trường gập.
+    Dòng chú thích (#) và dòng không có dấu ":" bị bỏ qua; đoạn kết thúc ở dòng trống đầu tiên.
+    """
+    fields = {}
+    key = None
+    for line in text.splitlines():
+        if not line.strip():
+            if fields:
+                break
+            continue
+        if line.startswith("#"):
+            continue
+        if line[0] in " \t":
+            if key is not None:
+                fields[key] += "\n" + line.rstrip()
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            key = None
+            continue
+        key = name.strip()
+        fields[key] = value.strip()
+    return fields
+
+
+def iter_paragraphs(text: str) -> Iterator[Dict[str, str]]:
+    """Duyệt các đoạn (stanza) của file có nhiều đoạn như Packages."""
+    lines = []
+    for line in text.splitlines():
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            yield parse_fields("\n".join(lines))
+            lines = []
+    if lines:
+        yield parse_fields("\n".join(lines))
+
+
+def description_text(value: str) -> str:
+    """Đổi Description dạng gập (dòng tóm tắt + các dòng " ...", " .") thành văn bản thường."""
+    synopsis, _, body = value.partition("\n")
+    lines = [synopsis]
+    for line in body.splitlines():
+        line = line[1:] if line[:1] in (" ", "\t") else line
+        lines.append("" if line.strip() == "." else line)
+    return "\n".join(lines)
+
+
+def split_stanzas(text: str):
+    """Tách nội dung Packages thành các stanza, mỗi stanza là tuple các dòng (giữ cả "\\n" và dòng trống cuối)."""
+    stanzas, current = [], []
+    for line in text.splitlines(keepends=True):
+        current.append(line)
+        if line == "\n":
+            stanzas.append(tuple(current))
+            current = []
+    if current:
+        stanzas.append(tuple(current))
+    return stanzas
+
+
+def _version_order(char):
+    if char == "~":
+        return -1
+    if char.isalpha():
+        return ord(char)
+    return ord(char) + 256
+
+
+def _compare_fragment(a, b):
+    ia = ib = 0
+    while ia < len(a) or ib < len(b):
+        while (ia < len(a) and not a[ia].isdigit()) or (ib < len(b) and not b[ib].isdigit()):
+            ac = _version_order(a[ia]) if ia < len(a) and not a[ia].isdigit() else 0
+            bc = _version_order(b[ib]) if ib < len(b) and not b[ib].isdigit() else 0
+            if ac != bc:
+                return ac - bc
+            ia += 1
+            ib += 1
+        while ia < len(a) and a[ia] == "0":
+            ia += 1
+        while ib < len(b) and b[ib] == "0":
+            ib += 1
+        first_diff = 0
+        while ia < len(a) and a[ia].isdigit() and ib < len(b) and b[ib].isdigit():
+            first_diff = first_diff or ord(a[ia]) - ord(b[ib])
+            ia += 1
+            ib += 1
+        if ia < len(a) and a[ia].isdigit():
+            return 1
+        if ib < len(b) and b[ib].isdigit():
+            return -1
+        if first_diff:
+            return first_diff
+    return 0
+
+
+def compare_versions(a: str, b: str) -> int:
+    """So sánh hai phiên bản theo quy tắc của dpkg (epoch:upstream-revision, "~" đứng trước mọi thứ)."""
+    def split(version):
+        epoch, _, rest = version.partition(":") if ":" in version else ("0", "", version)
+        upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "0")
+        return int(epoch or 0), upstream, revision
+
+    (epoch_a, upstream_a, revision_a), (epoch_b, upstream_b, revision_b) = split(a), split(b)
+    if epoch_a != epoch_b:
+        return epoch_a - epoch_b
+    return _compare_fragment(upstream_a, upstream_b) or _compare_fragment(revision_a, revision_b)
@@ -0,0 +1,23 @@
+"""Ghi file an toàn: atomic và chỉ khi nội dung thay đổi."""
+import hashlib
+import os
+
+
+def atomic_write(path, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_if_changed(path, data: bytes) -> bool:
+    """Chỉ ghi (atomic) khi nội dung khác file hiện có, để git/Pages không thấy thay đổi giả."""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                    return False
+    except OSError:
+        pass
+    atomic_write(path, data)
+    return True
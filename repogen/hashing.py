@@ -0,0 +1,133 @@
+"""Tính MD5/SHA1/SHA256/SHA512 trong cùng một lượt đọc."""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+
+HASH_ALGORITHMS = (("MD5sum", "md5"), ("SHA1", "sha1"), ("SHA256", "sha256"), ("SHA512", "sha512"))
+# Tên trường tương ứng trong file Release
+RELEASE_HASH_FIELDS = ("MD5Sum", "SHA1", "SHA256", "SHA512")
+CHUNK_SIZE = 1 << 20
+# Dưới ngưỡng này chi phí đồng bộ thread lớn hơn lợi ích, hash tuần tự
+THREADED_HASH_MIN = 8 * CHUNK_SIZE
+
+_hash_pool = None
+
+
+def _get_hash_pool():
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(max_workers=len(HASH_ALGORITHMS), thread_name_prefix="hash")
+    return _hash_pool
+
+
+def _reset_hash_pool():
+    # Thread của pool không sống sót qua fork(): process con phải tạo pool mới
+    global _hash_pool
+    _hash_pool = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_hash_pool)
+
+
+class MultiHasher:
+    """Đưa mỗi chunk vào cả 4 thuật toán hash cùng lúc.
+
+    Khi threaded=True, mỗi thuật toán chạy trên một thread riêng (hashlib nhả
+    GIL với buffer lớn). Buffer truyền vào update() không được ghi đè cho tới
+    lần gọi update()/wait() tiếp theo.
+    """
+
+    def __init__(self, threaded=False):
+        self._hashes = {field: hashlib.new(algo) for field, algo in HASH_ALGORITHMS}
+        self._threaded = threaded
+        self._pending = []
+
+    def update(self, data):
+        self.wait()
+        if self._threaded:
+            pool = _get_hash_pool()
+            self._pending = [pool.submit(h.update, data) for h in self._hashes.values()]
+        else:
+            for h in self._hashes.values():
+                h.update(data)
+
+    def wait(self):
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def hexdigests(self) -> Dict[str, str]:
+        self.wait()
+        return {field: h.hexdigest() for field, h in self._hashes.items()}
+
+
+class DigestReader:
+    """Bọc file đang đọc tuần tự: mọi byte đi qua đều được hash.
+
+    seek() chỉ cho phép tiến về phía trước và hash luôn đoạn bị bỏ qua, nhờ vậy
+    iter_ar_members() có thể dùng chung lượt đọc với việc tính checksum.
+    """
+
+    def __init__(self, f, hasher):
+        self._f = f
+        self._hasher = hasher
+        self._pos = 0
+        self._buffers = None
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self._pos += len(data)
+        self._hasher.update(data)
+        return data
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos):
+        if pos < self._pos:
+            raise ValueError("DigestReader chỉ hỗ trợ seek về phía trước")
+        self._consume(pos - self._pos)
+        return self._pos
+
+    def drain(self):
+        self._consume(None)
+
+    def _consume(self, remaining):
+        # Hai buffer luân phiên: đọc chunk kế tiếp trong lúc các thread hash chunk trước
+        if self._buffers is None:
+            self._buffers = (bytearray(CHUNK_SIZE), bytearray(CHUNK_SIZE))
+        index = 0
+        while remaining is None or remaining > 0:
+            view = memoryview(self._buffers[index])
+            if remaining is not None and remaining < CHUNK_SIZE:
+                view = view[:remaining]
+            n = self._f.readinto(view)
+            if not n:
+                break
+            self._hasher.update(view[:n])
+            self._pos += n
+            if remaining is not None:
+                remaining -= n
+            index ^= 1
+        self._hasher.wait()
+
+
+def hash_fileobj(f, threaded=False) -> Dict[str, str]:
+    hasher = MultiHasher(threaded)
+    DigestReader(f, hasher).drain()
+    return hasher.hexdigests()
+
+
+def generate_hashes(filepath):
+    threaded = os.path.getsize(filepath) >= THREADED_HASH_MIN
+    with open(filepath, "rb") as f:
+        return hash_fileobj(f, threaded)
+
+
+def hash_bytes(data: bytes) -> Dict[str, str]:
+    hasher = MultiHasher(threaded=len(data) >= THREADED_HASH_MIN)
+    hasher.update(data)
+    return hasher.hexdigests()
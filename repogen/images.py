@@ -0,0 +1,204 @@
+"""Tối ưu ảnh chụp màn hình và banner: PNG/JPEG nén lại, thumbnail và thumbnail WebP."""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .config import (BASE_URL, FEATURED_FILE, IMAGE_EXTENSIONS, IMAGE_FOLDER, IMAGE_MANIFEST, IMAGE_OUTPUT_FOLDER,
+                     IMAGE_SOURCE_FOLDERS, JPEG_QUALITY, WEBP_QUALITY)
+from .files import atomic_write, write_if_changed
+from .hashing import CHUNK_SIZE
+
+try:
+    from PIL import Image
+except ImportError:  # tùy chọn: bước tối ưu ảnh cần Pillow
+    Image = None
+
+
+def _site_url(path):
+    return f"{BASE_URL}/{path.replace(os.sep, '/')}"
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def image_variants(src):
+    """Đường dẫn các bản sinh ra từ ảnh gốc src (nằm trong optimized/, cùng cấu trúc thư mục)."""
+    stem, ext = os.path.splitext(src)
+    ext = ".jpg" if ext.lower() in (".jpg", ".jpeg") else ".png"
+    base = os.path.join(IMAGE_OUTPUT_FOLDER, stem)
+    return {"full": base + ext, "thumb": f"{base}-thumb{ext}", "thumb_webp": f"{base}-thumb.webp"}
+
+
+def package_screenshots(short_dir, overrides=None):
+    """Danh sách (URL ảnh cỡ gốc, URL thumbnail, URL thumbnail WebP hoặc None) của gói.
+
+    Chỉ gồm ảnh thực sự tồn tại. Mặc định lấy mọi ảnh trong images/<short_dir>/ theo thứ
+    tự tự nhiên; overrides.json có thể chỉ định danh sách riêng. Bản nào chưa được tạo
+    (vd. thiếu Pillow) thì dùng ảnh gốc thay thế.
+    """
+    folder = os.path.join(IMAGE_FOLDER, short_dir)
+    if overrides and "screenshots" in overrides:
+        names = overrides["screenshots"]
+    elif os.path.isdir(folder):
+        names = sorted((name for name in os.listdir(folder) if name.lower().endswith(IMAGE_EXTENSIONS)),
+                       key=_natural_key)
+    else:
+        names = []
+
+    screenshots = []
+    for name in names:
+        if "://" in name:
+            screenshots.append((name, name, None))
+            continue
+        src = os.path.join(folder, name)
+        if not os.path.exists(src):
+            continue
+        variants = {kind: path for kind, path in image_variants(src).items() if os.path.exists(path)}
+        thumb_webp = variants.get("thumb_webp")
+        screenshots.append((_site_url(variants.get("full", src)), _site_url(variants.get("thumb", src)),
+                            _site_url(thumb_webp) if thumb_webp else None))
+    return screenshots
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _save_image(image, path, fmt):
+    tmp_path = f"{path}.tmp"
+    if fmt == "webp":
+        image.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=6)
+    elif fmt == "jpg":
+        image.convert("RGB").save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(tmp_path, "PNG", optimize=True)
+    os.replace(tmp_path, path)
+
+
+def process_image(src, thumb_size):
+    """Tạo bản PNG/JPEG tối ưu cỡ gốc và thumbnail (PNG/JPEG + WebP) cho một ảnh."""
+    variants = image_variants(src)
+    fmt = "jpg" if variants["full"].endswith(".jpg") else "png"
+    os.makedirs(os.path.dirname(variants["full"]), exist_ok=True)
+    with Image.open(src) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        _save_image(image, variants["full"], fmt)
+        # Ảnh gốc đã nén tốt hơn thì giữ nguyên ảnh gốc
+        if os.path.getsize(variants["full"]) >= os.path.getsize(src):
+            with open(src, "rb") as f:
+                atomic_write(variants["full"], f.read())
+        image.thumbnail(thumb_size, Image.LANCZOS)
+        _save_image(image, variants["thumb"], fmt)
+        _save_image(image, variants["thumb_webp"], "webp")
+    return variants
+
+
+def _load_image_manifest():
+    try:
+        with open(IMAGE_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remove_variants(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def optimize_images(jobs=None):
+    """Tạo các bản tối ưu cho ảnh trong images/ và banner/, song song trên jobs process (mặc định: số CPU).
+
+    Kết quả được cache theo SHA256 của ảnh gốc trong optimized/manifest.json nên ảnh
+    không đổi sẽ được bỏ qua; ảnh gốc bị xóa thì các bản sinh ra cũng bị xóa, bản sinh
+    ra không còn dùng (vd. WebP cỡ gốc của phiên bản trước) cũng vậy.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if Image is None:
+        print("⚠️ Chưa cài Pillow, bỏ qua bước tối ưu ảnh")
+        return
+    manifest = _load_image_manifest()
+
+    sources = {}
+    for folder, thumb_size in IMAGE_SOURCE_FOLDERS.items():
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    sources[os.path.join(root, name)] = thumb_size
+
+    todo = {}
+    for src in sorted(sources):
+        digest = _file_sha256(src)
+        entry = manifest.get(src)
+        variants = image_variants(src)
+        if entry is not None and entry["variants"] != variants:
+            _remove_variants(set(entry["variants"].values()) - set(variants.values()))
+            entry = None
+        if entry is None or entry["sha256"] != digest or not all(map(os.path.exists, variants.values())):
+            todo[src] = digest
+
+    failures = []
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(process_image, src, sources[src]): src for src in todo}
+            for future in as_completed(futures):
+                src = futures[future]
+                try:
+                    manifest[src] = {"sha256": todo[src], "variants": future.result()}
+                except Exception as e:
+                    failures.append((src, e))
+    else:
+        for src in todo:
+            try:
+                manifest[src] = {"sha256": todo[src], "variants": process_image(src, sources[src])}
+            except Exception as e:
+                failures.append((src, e))
+
+    for src in set(manifest) - set(sources):
+        _remove_variants(manifest.pop(src)["variants"].values())
+
+    os.makedirs(IMAGE_OUTPUT_FOLDER, exist_ok=True)
+    write_if_changed(IMAGE_MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode("utf-8"))
+    for src, error in failures:
+        print(f"❌ Lỗi khi xử lý ảnh {src}: {error}")
+    print(f"🖼️ Đã tối ưu {len(todo) - len(failures)} ảnh, bỏ qua {len(sources) - len(todo)} ảnh không đổi")
+
+
+def update_featured_banners():
+    """Trỏ banner trong sileo-featured.json tới thumbnail đã tối ưu thay vì ảnh gốc nhiều MB.
+
+    File được viết tay nên chỉ giá trị "url" bị thay, phần còn lại giữ nguyên từng byte.
+    """
+    if not os.path.exists(FEATURED_FILE):
+        return
+    manifest = _load_image_manifest()
+    by_path = {}
+    for src, entry in manifest.items():
+        by_path[src] = entry["variants"]
+        for path in entry["variants"].values():
+            by_path[path] = entry["variants"]
+
+    with open(FEATURED_FILE, "r", encoding="utf-8") as f:
+        text = f.read()
+    urls = {}
+    for banner in json.loads(text).get("banners", []):
+        url = banner.get("url", "")
+        variants = by_path.get(os.path.normpath(url[len(BASE_URL) + 1:]))
+        if variants and os.path.exists(variants["thumb"]):
+            urls[url] = _site_url(variants["thumb"])
+    for old, new in urls.items():
+        text = re.sub(r'("url"\s*:\s*)' + re.escape(json.dumps(old, ensure_ascii=False)),
+                      lambda match: match.group(1) + json.dumps(new, ensure_ascii=False), text)
+    if write_if_changed(FEATURED_FILE, text.encode("utf-8")):
+        print(f"🖼️ Đã cập nhật banner trong {FEATURED_FILE}")
@@ -0,0 +1,274 @@
+"""Mô hình dữ liệu dùng chung cho mọi bước: đọc mỗi .deb một lần rồi dựng Packages từ đó."""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .cache import MetadataCache
+from .config import DEB_FOLDER, OUTPUT_FILE, PACKAGES_FILE
+from .deb import scan_deb
+from .deb822 import parse_fields, split_stanzas
+from .files import atomic_write
+from .hashing import generate_hashes
+from .model import PackageRecord
+from .render import render_packages
+from .stats import enable_stats, record_events, stage, stats_enabled
+
+
+def load_package(deb_path: str, cached=None, check_hash=False) -> PackageRecord:
+    """Đọc control + checksum của một .deb, hoặc lấy từ cache nếu file chưa đổi.
+
+    Chạy được trong process con của --jobs nên chỉ nhận/trả dữ liệu thuần.
+    """
+    filename = os.path.basename(deb_path)
+    size = os.path.getsize(deb_path)
+    with stage("package", filename, size):
+        from_cache = cached is not None
+        if from_cache and check_hash:
+            with stage("hash", filename, size):
+                from_cache = generate_hashes(deb_path)["SHA256"] == cached[1]["SHA256"]
+        if from_cache:
+            control, hashes = cached
+        else:
+            control, hashes = scan_deb(deb_path)
+    return PackageRecord(filename, deb_path, control, hashes, size, from_cache)
+
+
+def _load_package_worker(deb_path, cached, check_hash, collect_stats):
+    """load_package() cho process con của --jobs; gửi kèm các mốc --stats về process cha."""
+    stats = enable_stats() if collect_stats else None
+    result = load_package(deb_path, cached, check_hash)
+    return result, stats.events if stats else []
+
+
+def scan_packages(deb_paths, cache, check_hash=False, jobs=1):
+    """Đọc các .deb (song song nếu jobs > 1), cập nhật cache.
+
+    Trả về (danh sách PackageRecord theo thứ tự deb_paths, danh sách (filename, lỗi)).
+    """
+    tasks = {deb_path: (deb_path, cache.lookup(deb_path), check_hash) for deb_path in deb_paths}
+    results = {}
+    failures = []
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_load_package_worker, *task, stats_enabled()): deb_path
+                       for deb_path, task in tasks.items()}
+            for future in as_completed(futures):
+                deb_path = futures[future]
+                try:
+                    results[deb_path], events = future.result()
+                    record_events(events)
+                except Exception as e:
+                    failures.append((os.path.basename(deb_path), e))
+    else:
+        for deb_path, task in tasks.items():
+            try:
+                results[deb_path] = load_package(*task)
+            except Exception as e:
+                failures.append((os.path.basename(deb_path), e))
+
+    packages = []
+    for deb_path in tasks:
+        package = results.get(deb_path)
+        if package is None:
+            continue
+        if package.from_cache:
+            cache.hits += 1
+        else:
+            cache.misses += 1
+            cache.store(deb_path, package.control, package.hashes)
+        packages.append(package)
+    return packages, sorted(failures, key=lambda item: item[0])
+
+
+def list_debs():
+    # Sắp xếp để Packages giống hệt nhau dù chạy tuần tự hay song song
+    return [os.path.join(DEB_FOLDER, name) for name in sorted(os.listdir(DEB_FOLDER)) if name.endswith(".deb")]
+
+
+def load_repository(deb_paths=None, rebuild=False, check_hash=False, jobs=1):
+    """Đọc toàn bộ debs/ (hoặc chỉ deb_paths) qua cache. Mỗi .deb chỉ được đọc tối đa một lần mỗi lượt chạy.
+
+    Trả về (danh sách PackageRecord, danh sách lỗi); kết quả này được dùng chung cho
+    render, Packages và các bước nén, không bước nào phải đọc lại .deb.
+    """
+    cache = MetadataCache(use_existing=not rebuild)
+    full_scan = deb_paths is None
+    packages, failures = scan_packages(list_debs() if full_scan else deb_paths, cache, check_hash, jobs)
+    if full_scan:
+        cache.prune()
+    cache.save()
+    print(f"♻️ Dùng lại cache cho {cache.hits} gói, đọc lại {cache.misses} gói")
+    for filename, error in failures:
+        print(f"❌ Lỗi khi xử lý {filename}: {error}")
+    return packages, failures
+
+
+def format_stanza(filename, control, hashes, size) -> str:
+    return PackageRecord(filename, os.path.join(DEB_FOLDER, filename), control, hashes, size).to_stanza()
+
+
+def serialize_packages(packages) -> bytes:
+    """Dựng nội dung Packages từ danh sách PackageRecord, sắp theo tên file, bằng một lần join."""
+    with stage("serialize"):
+        return "".join(package.to_stanza() for package in sorted(packages, key=lambda package: package.filename)
+                       ).encode("utf-8")
+
+
+def write_packages_text(packages_data: bytes):
+    # Packages.txt và Packages luôn được ghi từ cùng một buffer
+    atomic_write(OUTPUT_FILE, packages_data)
+
+
+def generate_packages(rebuild=False, check_hash=False, jobs=1, render=True):
+    """Đọc debs/, tạo trang (nếu render) rồi ghi Packages.txt. Trả về (nội dung Packages, danh sách lỗi)."""
+    packages, failures = load_repository(rebuild=rebuild, check_hash=check_hash, jobs=jobs)
+    if render:
+        render_packages(packages)
+    packages_data = serialize_packages(packages)
+    write_packages_text(packages_data)
+    if render:
+        print("✅ Đã tạo file Packages.txt, depiction.json và HTML và thư mục chứa ảnh cho mỗi tweak")
+    else:
+        print(f"✅ Đã tạo file {OUTPUT_FILE}")
+    return packages_data, failures
+
+
+def _stanza_fields(stanza: str, *names):
+    fields = parse_fields(stanza)
+    return [fields.get(name, "") for name in names]
+
+
+class PackagesIndex:
+    """Các stanza của Packages, khóa theo Filename, để vá index mà không quét lại debs/.
+
+    Mỗi file .deb ứng với đúng một stanza, nên các bản cùng Package và Version
+    (vd. bản arm và arm64) vẫn có mặt đủ như khi chạy generate_packages().
+    Stanza được giữ nguyên văn bản; khi ghi ra thì sắp theo Filename.
+    """
+
+    def __init__(self):
+        self._stanzas = {}
+
+    @classmethod
+    def from_text(cls, text: str):
+        index = cls()
+        for lines in split_stanzas(text):
+            stanza = "".join(lines).rstrip("\n") + "\n\n"
+            if stanza.strip():
+                index.put(stanza)
+        return index
+
+    def put(self, stanza: str):
+        # File bị ghi đè bằng bản khác thì stanza mới thay stanza cũ của chính file đó
+        package, filename = _stanza_fields(stanza, "Package", "Filename")
+        self._stanzas[filename] = (package, stanza)
+
+    def remove_filename(self, filename: str) -> bool:
+        return self._stanzas.pop(filename, None) is not None
+
+    def filenames_for_package(self, package: str):
+        return [filename for filename, (pkg, _) in self._stanzas.items() if pkg == package]
+
+    def filenames(self):
+        return list(self._stanzas)
+
+    def remove_missing(self):
+        """Bỏ các stanza có Filename không còn tồn tại, trả về danh sách Filename đã bỏ."""
+        missing = [filename for filename in self._stanzas if not os.path.exists(filename)]
+        for filename in missing:
+            self.remove_filename(filename)
+        return missing
+
+    def to_bytes(self) -> bytes:
+        return "".join(self._stanzas[filename][1] for filename in sorted(self._stanzas)).encode("utf-8")
+
+
+def _resolve_target(target, index, cache):
+    """Đổi đường dẫn .deb hoặc Package ID thành danh sách đường dẫn .deb trong debs/.
+
+    Chỉ đọc control của những .deb không theo tên <Package ID>_*.deb, chưa có trong
+    index và chưa có trong cache, để thời gian cập nhật một gói không tăng theo repo.
+    """
+    if target.endswith(".deb"):
+        return [os.path.join(DEB_FOLDER, os.path.basename(target))]
+    package = target.lower()
+    matches = [os.path.normpath(filename) for filename in index.filenames_for_package(package)]
+    indexed = {os.path.normpath(filename) for filename in index.filenames()}
+    for deb_path in list_debs():
+        if deb_path in matches:
+            continue
+        # Bản mới của gói (vd. alpine_1.5.deb cạnh alpine_1.4.deb) chưa có Filename nào trong index
+        if os.path.basename(deb_path).lower().startswith(f"{package}_"):
+            matches.append(deb_path)
+            continue
+        if deb_path in indexed:
+            continue
+        cached = cache.lookup(deb_path)
+        if cached is None:
+            try:
+                cached = scan_deb(deb_path)
+            except Exception:
+                # .deb hỏng không thuộc về target nào; nó sẽ bị báo lỗi khi được index trực tiếp
+                continue
+            cache.store(deb_path, *cached)
+        if cached[0].get("Package", "").lower() == package:
+            matches.append(deb_path)
+    if not matches:
+        raise ValueError(f"Không tìm thấy gói {target} trong {DEB_FOLDER}/")
+    return matches
+
+
+def update_packages(targets, index=None, check_hash=False, render=True, rebuild=False, jobs=1):
+    """Chỉ xử lý các .deb/Package ID trong targets rồi vá vào Packages hiện có.
+
+    Các stanza có Filename không còn tồn tại cũng bị bỏ. rebuild chỉ bỏ qua cache của
+    các .deb được cập nhật, cache của các gói khác vẫn giữ. Trả về (nội dung Packages,
+    danh sách lỗi).
+    """
+    if index is None:
+        with open(PACKAGES_FILE, "r", encoding="utf-8") as f:
+            index = PackagesIndex.from_text(f.read())
+    cache = MetadataCache()
+    before = set(index.filenames())
+
+    failures = []
+    deb_paths = []
+    for target in targets:
+        try:
+            deb_paths.extend(_resolve_target(target, index, cache))
+        except ValueError as e:
+            failures.append((target, e))
+            print(f"❌ {e}")
+
+    existing = []
+    for deb_path in deb_paths:
+        if os.path.exists(deb_path):
+            existing.append(deb_path)
+        else:
+            filename = os.path.basename(deb_path)
+            index.remove_filename(f"./{DEB_FOLDER}/{filename}")
+            print(f"🗑️ Đã bỏ {filename} khỏi Packages")
+    if rebuild:
+        for deb_path in existing:
+            cache.forget(deb_path)
+
+    packages, scan_failures = scan_packages(existing, cache, check_hash, jobs)
+    for filename, error in scan_failures:
+        print(f"❌ Lỗi khi xử lý {filename}: {error}")
+    failures += scan_failures
+    for package in packages:
+        index.put(package.to_stanza())
+        print(f"🔁 Đã cập nhật {package.filename}")
+    if render:
+        render_packages(packages)
+
+    for filename in index.remove_missing():
+        print(f"🗑️ Đã bỏ {filename} khỏi Packages (file không còn tồn tại)")
+    # Chỉ stanza của file đã bị xóa mới được bỏ; không ghi Packages nếu mất stanza của file khác
+    lost = sorted(filename for filename in before - set(index.filenames()) if os.path.exists(filename))
+    if lost:
+        raise RuntimeError(f"Packages mất stanza của file vẫn còn trong {DEB_FOLDER}/: {', '.join(lost)}")
+
+    cache.save()
+    packages_data = index.to_bytes()
+    write_packages_text(packages_data)
+    return packages_data, failures
@@ -0,0 +1,344 @@
+"""Mirror gói từ repo khác: tải Release/Packages của upstream rồi chỉ tải lại những .deb có SHA256 thay đổi."""
+import bz2
+import contextlib
+import gzip
+import http.client
+import json
+import lzma
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlsplit
+
+from .cache import MetadataCache
+from .config import DEB_FOLDER, MIRROR_CONFIG, MIRROR_STATE_FILE, MIRROR_STATE_VERSION, MIRROR_TIMEOUT
+from .deb822 import compare_versions, iter_paragraphs, parse_fields
+from .hashing import CHUNK_SIZE, HASH_ALGORITHMS, THREADED_HASH_MIN, MultiHasher, generate_hashes, hash_bytes
+from .stats import stage
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# Thứ tự ưu tiên khi chọn file Packages của upstream
+UPSTREAM_INDEXES = (
+    ("Packages.xz", lzma.decompress),
+    ("Packages.bz2", bz2.decompress),
+    ("Packages.gz", gzip.decompress),
+    ("Packages", bytes),
+)
+USER_AGENT = "repogen-mirror/1.0"
+
+
+class HTTPPool:
+    """Giữ kết nối keep-alive theo (scheme, host, port), dùng chung được giữa nhiều thread.
+
+    Mỗi request mượn một kết nối rảnh (hoặc mở mới) và trả lại sau khi đã đọc hết body,
+    nên mọi file của cùng một upstream đi qua vài kết nối TCP/TLS thay vì mỗi file một kết nối.
+    """
+
+    def __init__(self, timeout=MIRROR_TIMEOUT):
+        self.timeout = timeout
+        self.requests = 0
+        self.connections = 0
+        self.bytes_received = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self.connections += 1
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            self._idle.setdefault(key, []).append(connection)
+
+    def _send(self, url, headers):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"URL không được hỗ trợ: {url}")
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity", **headers}
+        connection, reused = self._acquire(key)
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            connection.close()
+            if not reused:
+                raise
+            # Kết nối keep-alive đã bị server đóng trong lúc rảnh: thử lại bằng kết nối mới
+            with self._lock:
+                self.connections += 1
+            connection = type(connection)(parts.hostname, parts.port, timeout=self.timeout)
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+        with self._lock:
+            self.requests += 1
+        return key, connection, response
+
+    def _finish(self, key, connection, response):
+        # Phải đọc hết body thì kết nối mới dùng lại được
+        while response.read(CHUNK_SIZE):
+            pass
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+    @contextlib.contextmanager
+    def get(self, url, headers=None):
+        """GET url (tự theo redirect), trả về response đang mở; body có thể đọc dần theo chunk."""
+        for _ in range(MAX_REDIRECTS + 1):
+            key, connection, response = self._send(url, headers or {})
+            if response.status in REDIRECT_STATUSES and response.getheader("Location"):
+                self._finish(key, connection, response)
+                url = urljoin(url, response.getheader("Location"))
+                continue
+            try:
+                yield response
+            except BaseException:
+                # Bỏ dở giữa chừng (vd. checksum sai): đóng kết nối thay vì đọc nốt phần còn lại
+                connection.close()
+                raise
+            self._finish(key, connection, response)
+            return
+        raise OSError(f"Quá nhiều lần chuyển hướng khi tải {url}")
+
+    def read(self, response):
+        data = response.read()
+        self.count_received(len(data))
+        return data
+
+    def count_received(self, nbytes):
+        with self._lock:
+            self.bytes_received += nbytes
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+def load_mirror_config(path=MIRROR_CONFIG):
+    """Đọc mirrors.json: {"upstreams": [{"url": "https://repo.example.com/", "packages": ["com.a.b", ...]}]}."""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    upstreams = config.get("upstreams", [])
+    for upstream in upstreams:
+        if not upstream.get("url") or not upstream.get("packages"):
+            raise ValueError(f"Mỗi upstream trong {path} cần có 'url' và danh sách 'packages'")
+    return upstreams
+
+
+def _load_state():
+    try:
+        with open(MIRROR_STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    if state.get("version") != MIRROR_STATE_VERSION:
+        state = {"version": MIRROR_STATE_VERSION, "validators": {}, "packages": {}}
+    return state
+
+
+def _save_state(state):
+    tmp_path = f"{MIRROR_STATE_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, MIRROR_STATE_FILE)
+
+
+def fetch(pool, url, validators=None):
+    """GET có điều kiện (If-None-Match/If-Modified-Since). Trả về (status, body, validators mới)."""
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    with pool.get(url, headers) as response:
+        if response.status == 304:
+            return 304, None, validators
+        if response.status != 200:
+            return response.status, None, None
+        body = pool.read(response)
+        new_validators = {"etag": response.getheader("ETag"), "last_modified": response.getheader("Last-Modified")}
+    return 200, body, new_validators
+
+
+def download_deb(pool, url, dest, expected):
+    """Tải .deb về dest, hash ngay trong lúc tải và so với Size/checksum của upstream.
+
+    Chỉ khi khớp hết mới đổi tên file .part thành dest; trả về dict checksum.
+    """
+    size = int(expected["Size"])
+    hasher = MultiHasher(threaded=size >= THREADED_HASH_MIN)
+    tmp_path = f"{dest}.part"
+    received = 0
+    try:
+        with stage("download", os.path.basename(dest), size), pool.get(url) as response, open(tmp_path, "wb") as f:
+            if response.status != 200:
+                raise OSError(f"HTTP {response.status} khi tải {url}")
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                f.write(chunk)
+                received += len(chunk)
+        hashes = hasher.hexdigests()
+        if received != size:
+            raise ValueError(f"{url}: nhận {received} byte, Packages của upstream ghi {size}")
+        for field, _ in HASH_ALGORITHMS:
+            if field in expected and expected[field].lower() != hashes[field]:
+                raise ValueError(f"{url}: {field} không khớp với Packages của upstream")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        pool.count_received(received)
+    os.replace(tmp_path, dest)
+    return hashes
+
+
+def _fetch_upstream_index(pool, base, release, validators):
+    """Tải Packages của upstream; có Release thì chọn file được liệt kê và kiểm tra SHA256."""
+    listed = {}
+    if release is not None:
+        for line in release.get("SHA256", "").splitlines():
+            if line.strip():
+                digest, size, name = line.split()
+                listed[name] = digest
+    for name, decompress in UPSTREAM_INDEXES:
+        if listed and name not in listed:
+            continue
+        # Không có Release thì GET có điều kiện ngay trên file Packages
+        status, body, new_validators = fetch(pool, base + name, None if release is not None else validators)
+        if status == 304:
+            return None, validators
+        if status != 200:
+            continue
+        if name in listed and hash_bytes(body)["SHA256"] != listed[name]:
+            raise ValueError(f"{base}{name}: SHA256 không khớp với Release của upstream")
+        return decompress(body).decode("utf-8"), new_validators
+    raise OSError(f"Không tải được Packages từ {base}")
+
+
+def _select_packages(index_text, wanted):
+    """Chọn stanza phiên bản cao nhất cho mỗi Package ID trong wanted."""
+    best = {}
+    for fields in iter_paragraphs(index_text):
+        package = fields.get("Package", "").lower()
+        if package not in wanted or "Filename" not in fields:
+            continue
+        current = best.get(package)
+        if current is None or compare_versions(fields.get("Version", "0"), current.get("Version", "0")) > 0:
+            best[package] = fields
+    return best
+
+
+def _local_sha256(path, cache):
+    cached = cache.lookup(path)
+    if cached is not None:
+        return cached[1]["SHA256"]
+    return generate_hashes(path)["SHA256"]
+
+
+def sync_upstream(pool, upstream, state, jobs=4):
+    """Đồng bộ một upstream. Trả về (các .deb đã tải, các .deb cũ đã xóa, danh sách lỗi)."""
+    base = upstream["url"].rstrip("/") + "/"
+    wanted = {package.lower() for package in upstream["packages"]}
+    mirrored = state["packages"]
+    # Chỉ tin vào 304 khi mọi gói cần mirror vẫn còn nằm trong debs/
+    complete = all(package in mirrored and os.path.exists(os.path.join(DEB_FOLDER, mirrored[package]["filename"]))
+                   for package in wanted)
+    validators = state["validators"].get(base) if complete else None
+
+    status, release_body, release_validators = fetch(pool, base + "Release", validators)
+    if status == 304:
+        print(f"⏭️ {base}: Release không đổi")
+        return [], [], []
+    release = parse_fields(release_body.decode("utf-8")) if status == 200 else None
+    index_text, index_validators = _fetch_upstream_index(pool, base, release, validators)
+    if index_text is None:
+        print(f"⏭️ {base}: Packages không đổi")
+        return [], [], []
+
+    selected = _select_packages(index_text, wanted)
+    failures = [(package, ValueError(f"Không có {package} trong Packages của {base}"))
+                for package in sorted(wanted - set(selected))]
+
+    cache = MetadataCache()
+    todo = {}
+    for package, fields in sorted(selected.items()):
+        filename = os.path.basename(fields["Filename"])
+        dest = os.path.join(DEB_FOLDER, filename)
+        sha256 = fields.get("SHA256", "").lower()
+        previous = mirrored.get(package)
+        if previous and previous["sha256"] == sha256 and previous["filename"] == filename and os.path.exists(dest):
+            continue
+        if sha256 and os.path.exists(dest) and _local_sha256(dest, cache) == sha256:
+            mirrored[package] = {"upstream": base, "filename": filename, "sha256": sha256}
+            continue
+        todo[package] = (urljoin(base, fields["Filename"]), dest, fields)
+
+    downloaded, removed = [], []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {executor.submit(download_deb, pool, *task): package for package, task in todo.items()}
+        for future in as_completed(futures):
+            package = futures[future]
+            url, dest, fields = todo[package]
+            try:
+                hashes = future.result()
+            except Exception as e:
+                failures.append((package, e))
+                continue
+            previous = mirrored.get(package)
+            if previous and previous["filename"] != os.path.basename(dest):
+                old_path = os.path.join(DEB_FOLDER, previous["filename"])
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+                    removed.append(old_path)
+            mirrored[package] = {"upstream": base, "filename": os.path.basename(dest), "sha256": hashes["SHA256"]}
+            downloaded.append(dest)
+            print(f"⬇️ Đã tải {os.path.basename(dest)} ({fields['Size']} byte)")
+
+    if not failures:
+        # Chỉ lưu ETag/Last-Modified khi đồng bộ trọn vẹn, để lần sau còn thử lại phần bị lỗi
+        state["validators"][base] = release_validators if release is not None else index_validators
+    return sorted(downloaded), sorted(removed), failures
+
+
+def mirror(config_path=MIRROR_CONFIG, jobs=4):
+    """Đồng bộ mọi upstream trong mirrors.json. Trả về (.deb đã tải, .deb đã xóa, danh sách lỗi)."""
+    upstreams = load_mirror_config(config_path)
+    state = _load_state()
+    os.makedirs(DEB_FOLDER, exist_ok=True)
+    pool = HTTPPool()
+    downloaded, removed, failures = [], [], []
+    try:
+        for upstream in upstreams:
+            try:
+                result = sync_upstream(pool, upstream, state, jobs)
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                failures.append((upstream["url"], e))
+                continue
+            downloaded += result[0]
+            removed += result[1]
+            failures += result[2]
+    finally:
+        pool.close()
+        _save_state(state)
+    print(f"🌐 {pool.requests} request qua {pool.connections} kết nối, nhận {pool.bytes_received} byte")
+    for target, error in failures:
+        print(f"❌ {target}: {error}")
+    return downloaded, removed, failures
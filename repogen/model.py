@@ -0,0 +1,110 @@
+"""PackageRecord: một gói trong index, giữ gọn trong bộ nhớ và tự ghi ra stanza Packages."""
+import os
+from typing import Dict
+
+from .config import BASE_URL, DEB_FOLDER, ICON_PATH, SPONSOR
+
+
+def package_short_dir(filename: str) -> str:
+    return os.path.splitext(filename)[0].split("_")[0].split(".")[-1]
+
+
+class PackageRecord:
+    """Một .deb đã đọc: các trường control hay dùng nằm trong slot, trường còn lại trong `extra`.
+
+    Dùng __slots__ vì index của repo mirror có thể có hàng chục nghìn bản ghi. get() nhận
+    tên trường kiểu control (vd. "Version") nên render dùng được PackageRecord thay cho dict.
+    """
+
+    # Tên trường control -> slot
+    FIELD_SLOTS = {
+        "Package": "package",
+        "Version": "version",
+        "Architecture": "architecture",
+        "Section": "section",
+        "Installed-Size": "installed_size",
+        "Depends": "depends",
+        "Description": "description",
+        "Name": "name",
+        "Author": "author",
+    }
+    HASH_SLOTS = {"MD5sum": "md5sum", "SHA1": "sha1", "SHA256": "sha256", "SHA512": "sha512"}
+
+    __slots__ = tuple(FIELD_SLOTS.values()) + tuple(HASH_SLOTS.values()) + (
+        "filename", "deb_path", "size", "from_cache", "extra")
+
+    def __init__(self, filename, deb_path, control, hashes, size, from_cache=False):
+        self.filename = filename
+        self.deb_path = deb_path
+        self.size = size
+        self.from_cache = from_cache
+        extra = {}
+        for slot in self.FIELD_SLOTS.values():
+            setattr(self, slot, None)
+        for field, value in control.items():
+            slot = self.FIELD_SLOTS.get(field)
+            if slot is None:
+                extra[field] = value
+            else:
+                setattr(self, slot, value)
+        self.extra = extra or None
+        for field, slot in self.HASH_SLOTS.items():
+            setattr(self, slot, hashes[field])
+
+    def __repr__(self):
+        return f"PackageRecord({self.filename!r}, {self.package!r}, {self.version!r})"
+
+    def get(self, field, default=None):
+        slot = self.FIELD_SLOTS.get(field)
+        value = getattr(self, slot) if slot is not None else (self.extra or {}).get(field)
+        return default if value is None else value
+
+    def __contains__(self, field):
+        return self.get(field) is not None
+
+    @property
+    def control(self) -> Dict[str, str]:
+        control = {field: getattr(self, slot) for field, slot in self.FIELD_SLOTS.items()
+                   if getattr(self, slot) is not None}
+        control.update(self.extra or {})
+        return control
+
+    @property
+    def hashes(self) -> Dict[str, str]:
+        return {field: getattr(self, slot) for field, slot in self.HASH_SLOTS.items()}
+
+    @property
+    def short_dir(self) -> str:
+        return package_short_dir(self.filename)
+
+    def to_stanza(self) -> str:
+        """Stanza Packages của gói (kết thúc bằng dòng trống), dựng bằng một lần join."""
+        short_dir = self.short_dir
+        lines = [
+            f"Package: {self.get('Package', 'unknown').lower()}",
+            f"Architecture: {self.get('Architecture', 'iphoneos-arm64')}",
+            f"Version: {self.get('Version', '1.0.0')}",
+            f"Section: {self.get('Section', 'Tweaks')}",
+            "Maintainer: Diễn Nguyễn",
+            f"Installed-Size: {self.get('Installed-Size', '1024')}",
+        ]
+        if self.depends is not None:
+            lines.append(f"Depends: {self.depends}")
+        lines += [
+            f"Filename: ./{DEB_FOLDER}/{self.filename}",
+            f"Size: {self.size}",
+            f"MD5sum: {self.md5sum}",
+            f"SHA1: {self.sha1}",
+            f"SHA256: {self.sha256}",
+            f"SHA512: {self.sha512}",
+            f"Description: {self.get('Description', 'No description')}",
+            f"Depiction: {BASE_URL}/descriptions/{short_dir}/{short_dir}.html",
+            f"SileoDepiction: {BASE_URL}/descriptions/{short_dir}/depiction.json",
+            f"Name: {self.get('Name', '')}",
+            f"Author: {self.get('Author', '')}",
+            f"Sponsor: {SPONSOR}",
+            f"Icon: {ICON_PATH}",
+            "",
+            "",
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,241 @@
+"""Ghi Packages và các bản nén, Release kèm by-hash và patch Packages.diff."""
+import bz2
+import difflib
+import gzip
+import lzma
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from .catalog import write_catalog
+from .config import (BY_HASH_ALGORITHMS, BY_HASH_FOLDER, BZIP_FILE, PACKAGES_FILE, PDIFF_FOLDER, PDIFF_HISTORY, PDIFF_INDEX,
+                     RELEASE_DEFAULTS, RELEASE_FILE)
+from .deb822 import parse_fields, split_stanzas
+from .files import atomic_write
+from .hashing import HASH_ALGORITHMS, RELEASE_HASH_FIELDS, hash_bytes
+from .stats import stage
+
+try:
+    import zstandard
+except ImportError:  # tùy chọn: tạo Packages.zst
+    zstandard = None
+
+
+def _zstd_compress(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# định dạng -> (tên file, hàm nén, mức nén mặc định)
+INDEX_FORMATS = {
+    "bz2": (BZIP_FILE, lambda data, level: bz2.compress(data, level), 9),
+    "gz": ("Packages.gz", lambda data, level: gzip.compress(data, level, mtime=0), 9),
+    "xz": ("Packages.xz", lambda data, level: lzma.compress(data, lzma.FORMAT_XZ, preset=level), 6),
+    "lzma": ("Packages.lzma", lambda data, level: lzma.compress(data, lzma.FORMAT_ALONE, preset=level), 6),
+    "zst": ("Packages.zst", _zstd_compress, 19),
+}
+
+
+def available_index_formats():
+    return [fmt for fmt in INDEX_FORMATS if fmt != "zst" or zstandard is not None]
+
+
+def read_published_indexes():
+    """Đọc lại Packages và các bản nén đang có trên đĩa (tên file -> nội dung)."""
+    outputs = {}
+    for filename in [PACKAGES_FILE] + [entry[0] for entry in INDEX_FORMATS.values()]:
+        if os.path.exists(filename):
+            with open(filename, "rb") as f:
+                outputs[filename] = f.read()
+    return outputs
+
+
+def write_indexes(packages_data: bytes, levels=None, formats=None):
+    """Ghi Packages và các bản nén từ cùng một buffer, mỗi định dạng nén trên một thread.
+
+    bz2/zlib/lzma/zstandard đều nhả GIL khi nén nên các định dạng chạy song song thật sự.
+    Bản nén của định dạng không được chọn bị xóa, để client và Release không gặp bản cũ.
+    Trả về dict tên file -> nội dung đã ghi.
+    """
+    levels = levels or {}
+    formats = formats or available_index_formats()
+    outputs = {PACKAGES_FILE: packages_data}
+
+    def compress_format(fmt):
+        _, compress, default_level = INDEX_FORMATS[fmt]
+        with stage(f"compress-{fmt}", nbytes=len(packages_data)):
+            return compress(packages_data, levels.get(fmt, default_level))
+
+    with ThreadPoolExecutor(max_workers=len(formats)) as pool:
+        futures = {}
+        for fmt in formats:
+            futures[INDEX_FORMATS[fmt][0]] = pool.submit(compress_format, fmt)
+        for filename, future in futures.items():
+            outputs[filename] = future.result()
+    for filename, data in outputs.items():
+        atomic_write(filename, data)
+    print(f"🗜️ Đã tạo file {', '.join(outputs)}")
+    for fmt, (filename, _, _) in INDEX_FORMATS.items():
+        if fmt not in formats and os.path.exists(filename):
+            os.remove(filename)
+            print(f"🗑️ Đã xóa {filename} (không nằm trong --formats)")
+    return outputs
+
+
+def _by_hash_digests(release_fields, field):
+    return {line.split()[0] for line in release_fields.get(field, "").splitlines() if line.strip()}
+
+
+def write_release(outputs, extra_files=None):
+    """Tạo Release với Date, checksum của mọi bản Packages và cây by-hash/SHA256, by-hash/SHA512.
+
+    by-hash giữ các file của Release hiện tại và Release ngay trước đó, để
+    client đang cập nhật dở vẫn tải được index cũ. extra_files (vd. Packages.diff/Index)
+    chỉ được liệt kê checksum, không đưa vào by-hash.
+    """
+    listed = dict(outputs)
+    listed.update(extra_files or {})
+    previous = {}
+    if os.path.exists(RELEASE_FILE):
+        with open(RELEASE_FILE, "r", encoding="utf-8") as f:
+            previous = parse_fields(f.read())
+
+    fields = dict(RELEASE_DEFAULTS)
+    fields.update((k, v) for k, v in previous.items() if k not in ("Date", "Acquire-By-Hash") + RELEASE_HASH_FIELDS)
+    fields["Date"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S UTC")
+    fields["Acquire-By-Hash"] = "yes"
+
+    digests = {filename: hash_bytes(data) for filename, data in listed.items()}
+    lines = [f"{key}: {val}" for key, val in fields.items()]
+    for field, (hash_name, _) in zip(RELEASE_HASH_FIELDS, HASH_ALGORITHMS):
+        lines.append(f"{field}:")
+        for filename, data in listed.items():
+            lines.append(f" {digests[filename][hash_name]} {len(data):>16} {filename}")
+    release_data = ("\n".join(lines) + "\n").encode("utf-8")
+
+    for algorithm in BY_HASH_ALGORITHMS:
+        folder = os.path.join(BY_HASH_FOLDER, algorithm)
+        os.makedirs(folder, exist_ok=True)
+        current = set()
+        for filename, data in outputs.items():
+            digest = digests[filename][algorithm]
+            current.add(digest)
+            path = os.path.join(folder, digest)
+            if not os.path.exists(path):
+                atomic_write(path, data)
+        keep = current | _by_hash_digests(previous, algorithm)
+        for name in os.listdir(folder):
+            if name not in keep:
+                os.remove(os.path.join(folder, name))
+
+    # Release ghi sau cùng để client không bao giờ thấy Release trỏ tới index chưa có
+    atomic_write(RELEASE_FILE, release_data)
+    print(f"🔏 Đã tạo file {RELEASE_FILE} và {BY_HASH_FOLDER}/{{{','.join(BY_HASH_ALGORITHMS)}}}/")
+    return release_data
+
+
+def _ed_range(start, end):
+    return f"{start}" if start == end else f"{start},{end}"
+
+
+def make_ed_patch(old_text: str, new_text: str) -> str:
+    """Tạo ed script (như `diff --ed`) biến old_text thành new_text.
+
+    So sánh theo từng stanza thay vì từng dòng: các stanza gần như luôn khác
+    nhau nên SequenceMatcher chạy nhanh, rồi mới đổi ra số dòng cho ed.
+    Lệnh được xuất từ cuối file lên đầu để số dòng không bị lệch khi áp dụng.
+    """
+    old_stanzas = split_stanzas(old_text)
+    new_stanzas = split_stanzas(new_text)
+    old_starts = [0]
+    for stanza in old_stanzas:
+        old_starts.append(old_starts[-1] + len(stanza))
+
+    matcher = difflib.SequenceMatcher(None, old_stanzas, new_stanzas, autojunk=False)
+    commands = []
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag == "equal":
+            continue
+        new_lines = "".join(line for stanza in new_stanzas[j1:j2] for line in stanza)
+        if tag == "delete":
+            commands.append(f"{_ed_range(old_starts[i1] + 1, old_starts[i2])}d\n")
+        elif tag == "insert":
+            commands.append(f"{old_starts[i1]}a\n{new_lines}.\n")
+        else:
+            commands.append(f"{_ed_range(old_starts[i1] + 1, old_starts[i2])}c\n{new_lines}.\n")
+    return "".join(commands)
+
+
+def _read_pdiff_history():
+    """Trả về (sha256 của Packages lúc ghi Index, list (tên patch, sha256 cũ, size cũ, sha256 patch,
+    size patch, sha256 .gz, size .gz))."""
+    if not os.path.exists(PDIFF_INDEX):
+        return None, []
+    with open(PDIFF_INDEX, "r", encoding="utf-8") as f:
+        fields = parse_fields(f.read())
+
+    def rows(field):
+        return {line.split()[2]: line.split()[:2] for line in fields.get(field, "").splitlines() if line.strip()}
+
+    history = rows("SHA256-History")
+    patches = rows("SHA256-Patches")
+    downloads = {name[:-3]: row for name, row in rows("SHA256-Download").items()}
+    entries = []
+    for name, (old_sha, old_size) in history.items():
+        if name in patches and name in downloads:
+            entries.append((name, old_sha, old_size, *patches[name], *downloads[name]))
+    current = fields.get("SHA256-Current", "").split()
+    return (current[0] if current else None), entries
+
+
+def write_pdiff(old_data, new_data: bytes, history_size=PDIFF_HISTORY):
+    """Tạo patch ed nén gzip trong Packages.diff/ và cập nhật Packages.diff/Index kiểu APT.
+
+    Chỉ giữ history_size patch gần nhất. Nếu Packages đã đổi mà không qua --pdiff (old_data
+    khác SHA256-Current của Index) thì chuỗi patch bị đứt: bỏ toàn bộ lịch sử cũ.
+    Trả về nội dung Index để đưa vào Release.
+    """
+    os.makedirs(PDIFF_FOLDER, exist_ok=True)
+    current, entries = _read_pdiff_history()
+    if entries and (old_data is None or current != hash_bytes(old_data)["SHA256"]):
+        print(f"⚠️ {PDIFF_FOLDER}/Index không khớp với {PACKAGES_FILE} hiện có, bỏ {len(entries)} patch cũ")
+        entries = []
+
+    if old_data is not None and old_data != new_data:
+        patch = make_ed_patch(old_data.decode("utf-8"), new_data.decode("utf-8")).encode("utf-8")
+        patch_gz = gzip.compress(patch, 9, mtime=0)
+        name = datetime.now(timezone.utc).strftime("%Y-%m-%d-%H%M.%S")
+        atomic_write(os.path.join(PDIFF_FOLDER, f"{name}.gz"), patch_gz)
+        entries = [entry for entry in entries if entry[0] != name]
+        entries.append((name, hash_bytes(old_data)["SHA256"], str(len(old_data)),
+                        hash_bytes(patch)["SHA256"], str(len(patch)),
+                        hash_bytes(patch_gz)["SHA256"], str(len(patch_gz))))
+        print(f"🩹 Đã tạo patch {PDIFF_FOLDER}/{name}.gz ({len(patch_gz)} byte)")
+
+    entries = entries[-history_size:] if history_size > 0 else []
+    keep = {f"{entry[0]}.gz" for entry in entries} | {"Index"}
+    for name in os.listdir(PDIFF_FOLDER):
+        if name not in keep:
+            os.remove(os.path.join(PDIFF_FOLDER, name))
+
+    lines = [f"SHA256-Current: {hash_bytes(new_data)['SHA256']} {len(new_data)}", "SHA256-History:"]
+    lines += [f" {entry[1]} {entry[2]:>8} {entry[0]}" for entry in entries]
+    lines.append("SHA256-Patches:")
+    lines += [f" {entry[3]} {entry[4]:>8} {entry[0]}" for entry in entries]
+    lines.append("SHA256-Download:")
+    lines += [f" {entry[5]} {entry[6]:>8} {entry[0]}.gz" for entry in entries]
+    index_data = ("\n".join(lines) + "\n").encode("utf-8")
+    atomic_write(PDIFF_INDEX, index_data)
+    return index_data
+
+
+def publish_indexes(packages_data, old_packages=None, levels=None, formats=None, pdiff=False,
+                    pdiff_history=PDIFF_HISTORY):
+    """Ghi Packages.diff (tùy chọn), các bản nén của Packages, Release và catalogue tìm kiếm cho website."""
+    extra_files = {}
+    if pdiff:
+        with stage("pdiff", nbytes=len(packages_data)):
+            extra_files[PDIFF_INDEX] = write_pdiff(old_packages, packages_data, pdiff_history)
+    outputs = write_indexes(packages_data, levels=levels, formats=formats)
+    with stage("release", nbytes=sum(map(len, outputs.values()))):
+        write_release(outputs, extra_files)
+    write_catalog(packages_data)
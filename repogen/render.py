@@ -0,0 +1,179 @@
+"""Tạo depiction.json và trang HTML cho từng gói từ các template trong templates/."""
+import json
+import os
+import re
+from datetime import datetime
+
+from .config import (BASE_URL, DEPICTION_TEMPLATE, DESCRIPTION_FOLDER, HTML_TEMPLATE, IMAGE_FOLDER, OVERRIDES_FILE,
+                     TEMPLATE_FOLDER)
+from .files import write_if_changed
+from .deb822 import compare_versions, description_text
+from .images import package_screenshots
+from .model import package_short_dir
+from .stats import stage
+
+
+class Template:
+    """Template với slot `{{ tên }}`, được tách sẵn thành các đoạn cố định khi nạp.
+
+    render() chỉ còn nối chuỗi; escape (nếu có) áp dụng cho mọi giá trị slot.
+    """
+
+    SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+    def __init__(self, text, escape=str):
+        parts = self.SLOT_PATTERN.split(text)
+        self._literals = parts[0::2]
+        self._slots = parts[1::2]
+        self._escape = escape
+
+    @classmethod
+    def load(cls, filename, escape=str):
+        with open(os.path.join(TEMPLATE_FOLDER, filename), "r", encoding="utf-8") as f:
+            text = f.read()
+        # Bỏ dòng trống cuối file template để output giữ nguyên như trước
+        if text.endswith("\n"):
+            text = text[:-1]
+        return cls(text, escape)
+
+    def render(self, **values):
+        escape = self._escape
+        out = [self._literals[0]]
+        for slot, literal in zip(self._slots, self._literals[1:]):
+            out.append(escape(values[slot]))
+            out.append(literal)
+        return "".join(out)
+
+
+def _json_value(value):
+    # Chuỗi được chèn vào giữa cặp nháy có sẵn trong template, kiểu khác (list, dict) ghi nguyên JSON
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)[1:-1]
+    return json.dumps(value, ensure_ascii=False)
+
+
+_templates = {}
+
+
+def get_template(filename, escape=str):
+    # Mỗi process chỉ đọc và tách template một lần
+    if filename not in _templates:
+        _templates[filename] = Template.load(filename, escape)
+    return _templates[filename]
+
+
+def load_overrides(short_dir):
+    """Đọc descriptions/<short_dir>/overrides.json (nếu có).
+
+    Các khóa hỗ trợ: "screenshots" (tên file trong images/<short_dir>/ hoặc URL đầy đủ),
+    "changelog" (danh sách dòng thay đổi) và "compatibility".
+    File hỏng (vd. đang sửa dở) chỉ bị cảnh báo và coi như không có overrides.
+    """
+    path = os.path.join(DESCRIPTION_FOLDER, short_dir, OVERRIDES_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Bỏ qua {path}: {e}")
+        return {}
+    if not isinstance(overrides, dict):
+        print(f"⚠️ Bỏ qua {path}: cần một object JSON")
+        return {}
+    return overrides
+
+
+def create_depiction(control, short_dir, overrides=None):
+    overrides = overrides or {}
+    screenshots = [{"url": thumb, "accessibilityText": "Screenshot"}
+                   for _, thumb, _ in package_screenshots(short_dir, overrides)]
+    version = control.get("Version", "1.0")
+    description = description_text(control.get("Description", "Không có mô tả"))
+    if "changelog" in overrides:
+        changelog = "\n".join([f"### Phiên bản {version}"] + [f"- {line}" for line in overrides["changelog"]])
+    else:
+        changelog = f"### Phiên bản {version} - {description}"
+
+    content = get_template(DEPICTION_TEMPLATE, _json_value).render(
+        base_url=BASE_URL,
+        short_dir=short_dir,
+        description=description,
+        changelog=changelog,
+        screenshots=screenshots,
+    )
+
+    output_dir = os.path.join(DESCRIPTION_FOLDER, short_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    return write_if_changed(os.path.join(output_dir, "depiction.json"), content.encode("utf-8"))
+
+
+def _screenshot_html(full, thumb, thumb_webp):
+    # Trình duyệt hỗ trợ WebP tải thumbnail WebP; bấm vào ảnh mở bản cỡ gốc đã tối ưu
+    source = f'<source type="image/webp" srcset="{thumb_webp}">' if thumb_webp else ""
+    return (f'<a class="imgcard" href="{full}"><picture>{source}'
+            f'<img src="{thumb}" style="width: 100%"></picture></a>')
+
+
+def create_html_description(control, short_dir, upload_date=None, overrides=None):
+    overrides = overrides or {}
+    # Dùng ngày của file .deb thay vì hôm nay để HTML không đổi giữa các lần chạy
+    upload_date = upload_date or datetime.now()
+
+    screenshots = [_screenshot_html(*screenshot) for screenshot in package_screenshots(short_dir, overrides)]
+    changelog = overrides.get("changelog", ["Hỗ trợ Rootless"])
+
+    html_content = get_template(HTML_TEMPLATE).render(
+        base_url=BASE_URL,
+        short_dir=short_dir,
+        name=control.get("Name", "Không có tên"),
+        author=control.get("Author", control.get("Maintainer", "Không rõ")),
+        section=control.get("Section", "Tweaks"),
+        description=description_text(control.get("Description", "Không có mô tả")),
+        version=control.get("Version", "1.0.0"),
+        compatibility=overrides.get("compatibility", control.get("Compatibility", "iOS 14.0 đến 17.0")),
+        today=upload_date.strftime("%d/%m/%Y"),
+        year=upload_date.year,
+        screenshots="\n            ".join(screenshots),
+        changelog="\n               ".join(f"<p>- {line}</p>" for line in changelog),
+    )
+
+    output_dir = os.path.join(DESCRIPTION_FOLDER, short_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    return write_if_changed(os.path.join(output_dir, f"{short_dir}.html"), html_content.encode("utf-8"))
+
+
+def render_package(deb_path, control, depiction_only=False):
+    """Tạo depiction (và HTML nếu không depiction_only), trả về số file thực sự được ghi."""
+    filename = os.path.basename(deb_path)
+    short_dir = package_short_dir(filename)
+    with stage("render", filename):
+        overrides = load_overrides(short_dir)
+        pages_written = create_depiction(control, short_dir, overrides)
+        if not depiction_only:
+            upload_date = datetime.fromtimestamp(os.path.getmtime(deb_path))
+            pages_written += create_html_description(control, short_dir, upload_date, overrides)  # Tạo file HTML
+    return pages_written
+
+
+def render_packages(packages, depiction_only=False):
+    """Tạo trang cho các gói đã đọc (danh sách PackageRecord), không đụng tới Packages.
+
+    Các bản của cùng một gói dùng chung descriptions/<short_dir>/ nên mỗi short_dir chỉ
+    render bản có Version lớn nhất; các bản cũ không ghi đè trang của bản mới.
+    """
+    os.makedirs(IMAGE_FOLDER, exist_ok=True)
+    latest = {}
+    for package in packages:
+        current = latest.get(package.short_dir)
+        if current is None or compare_versions(package.get("Version", "0"), current.get("Version", "0")) > 0:
+            latest[package.short_dir] = package
+    pages_written = 0
+    for package in latest.values():
+        pages_written += render_package(package.deb_path, package, depiction_only)
+        # Tạo thư mục trong images
+        os.makedirs(os.path.join(IMAGE_FOLDER, package.short_dir), exist_ok=True)
+    print(f"📝 Đã ghi lại {pages_written} file depiction/HTML có thay đổi")
+    return pages_written
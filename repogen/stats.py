@@ -0,0 +1,133 @@
+"""Đo thời gian, số byte và bộ nhớ đỉnh của từng bước cho --stats/--trace."""
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows không có getrusage
+    resource = None
+
+
+def peak_rss():
+    """RSS đỉnh của process tới thời điểm gọi (byte), tính cả bộ nhớ của Pillow/lzma/bz2; None nếu không đo được."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageStats:
+    """Ghi thời gian, số byte và bộ nhớ đỉnh của từng bước khi chạy với --stats.
+
+    Mặc định bộ nhớ là RSS đỉnh của process (getrusage) khi bước kết thúc: không làm chậm
+    chương trình nhưng chỉ tăng dần, nên cho biết bước nào đẩy đỉnh lên chứ không cho biết
+    riêng từng bước dùng bao nhiêu. trace_malloc=True đo thêm heap Python đỉnh của từng bước
+    bằng tracemalloc; cách này làm chậm mọi phép cấp phát (thời gian đo được sẽ lớn hơn thực tế)
+    và không thấy bộ nhớ cấp phát ngoài Python. Heap chỉ đo cho bước chạy trên thread chính,
+    vì tracemalloc là bộ đếm chung của cả process.
+    """
+
+    def __init__(self, trace_malloc=False):
+        self.events = []
+        self.trace_malloc = trace_malloc
+        self._stack = []
+        if trace_malloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, package=None, nbytes=0):
+        track_memory = self.trace_malloc and threading.current_thread() is threading.main_thread()
+        if track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame = [current, 0]
+            self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            peak_memory = None
+            if track_memory:
+                self._stack.pop()
+                peak = max(tracemalloc.get_traced_memory()[1], frame[1])
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+                peak_memory = max(peak - frame[0], 0)
+            self.events.append({
+                "stage": name, "package": package, "start": start, "duration": duration, "bytes": nbytes,
+                "peak_memory": peak_memory, "peak_rss": peak_rss(), "pid": os.getpid(), "tid": threading.get_ident(),
+            })
+
+    def summary(self, slowest=10):
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault(event["stage"], {"count": 0, "duration": 0.0, "bytes": 0, "memory": 0})
+            total["count"] += 1
+            total["duration"] += event["duration"]
+            total["bytes"] += event["bytes"]
+            memory = event["peak_memory"] if self.trace_malloc else event.get("peak_rss")
+            total["memory"] = max(total["memory"], memory or 0)
+
+        # Cột bộ nhớ: heap Python đỉnh của bước (--trace-malloc) hoặc RSS đỉnh của process
+        memory_title = "Heap đỉnh" if self.trace_malloc else "RSS đỉnh"
+        print("📊 Thống kê theo bước:")
+        print(f"  {'Bước':<18} {'Số lần':>7} {'Tổng (s)':>10} {'MB':>9} {'MB/s':>9} {memory_title:>12}")
+        for name, total in sorted(totals.items(), key=lambda item: -item[1]["duration"]):
+            mb = total["bytes"] / (1 << 20)
+            rate = f"{mb / total['duration']:9.1f}" if total["bytes"] and total["duration"] else f"{'-':>9}"
+            print(f"  {name:<18} {total['count']:>7} {total['duration']:>10.3f} {mb:>9.1f} {rate} "
+                  f"{total['memory'] / (1 << 20):>10.1f}MB")
+
+        packages = [event for event in self.events if event["stage"] == "package"]
+        if packages:
+            print(f"🐢 {min(slowest, len(packages))} gói chậm nhất:")
+            for event in sorted(packages, key=lambda event: -event["duration"])[:slowest]:
+                print(f"  {event['duration']:8.3f}s  {event['package']}")
+
+    def write_trace(self, path):
+        """Ghi file Chrome trace-event (mở bằng chrome://tracing hoặc Perfetto)."""
+        trace_events = [{
+            "name": event["stage"], "cat": "gen", "ph": "X", "pid": event["pid"], "tid": event["tid"],
+            "ts": event["start"] * 1e6, "dur": event["duration"] * 1e6,
+            "args": {"package": event["package"], "bytes": event["bytes"], "peak_memory": event["peak_memory"],
+                     "peak_rss": event.get("peak_rss")},
+        } for event in self.events]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        print(f"🧭 Đã ghi trace vào {path}")
+
+
+_stats = None
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def enable_stats(trace_malloc=False):
+    global _stats
+    _stats = StageStats(trace_malloc)
+    return _stats
+
+
+def stats_enabled():
+    return _stats is not None
+
+
+def record_events(events):
+    """Gộp các mốc đo được trong process con (--jobs) vào bộ đếm của process cha."""
+    if _stats is not None:
+        _stats.events.extend(events)
+
+
+def stage(name, package=None, nbytes=0):
+    """Đánh dấu một bước để --stats đo; khi không bật --stats chỉ tốn một phép so sánh."""
+    if _stats is None:
+        return _NULL_STAGE
+    return _stats.stage(name, package, nbytes)
@@ -0,0 +1,159 @@
+"""Kiểm tra các file index đã xuất bản có khớp với nhau và với các .deb trong debs/ không."""
+import bz2
+import gzip
+import lzma
+import os
+import re
+
+from .cache import MetadataCache
+from .config import BASE_URL, OUTPUT_FILE, PACKAGES_FILE, RELEASE_FILE
+from .deb822 import iter_paragraphs, parse_fields
+from .hashing import HASH_ALGORITHMS, RELEASE_HASH_FIELDS, hash_bytes
+from .index import list_debs, scan_packages
+from .publish import INDEX_FORMATS
+from .stats import stage
+
+try:
+    import zstandard
+except ImportError:  # tùy chọn: kiểm tra Packages.zst
+    zstandard = None
+
+
+def _zstd_decompress(data):
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+INDEX_DECOMPRESSORS = {
+    "bz2": bz2.decompress,
+    "gz": gzip.decompress,
+    "xz": lzma.decompress,
+    "lzma": lzma.decompress,
+    "zst": _zstd_decompress,
+}
+
+
+DEPICTION_FIELDS = ("Depiction", "SileoDepiction")
+# Package ID bị lặp tiền tố, vd. com.diennguyen.com.diennguyen.appdataplus
+REPEATED_PREFIX = re.compile(r"^((?:[^.]+\.){2,})\1")
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def verify_indexes():
+    """So Packages.txt và mọi bản nén với Packages, và checksum trong Release với file thật.
+
+    Trả về danh sách lỗi (rỗng nếu mọi thứ khớp).
+    """
+    if not os.path.exists(PACKAGES_FILE):
+        return [f"Không có file {PACKAGES_FILE}"]
+    packages_data = _read(PACKAGES_FILE)
+    problems = []
+
+    if os.path.exists(OUTPUT_FILE) and _read(OUTPUT_FILE) != packages_data:
+        problems.append(f"{OUTPUT_FILE} khác {PACKAGES_FILE}")
+    for fmt, (filename, _, _) in INDEX_FORMATS.items():
+        if not os.path.exists(filename):
+            continue
+        if fmt == "zst" and zstandard is None:
+            print(f"⚠️ Chưa cài zstandard, bỏ qua {filename}")
+            continue
+        try:
+            data = INDEX_DECOMPRESSORS[fmt](_read(filename))
+        except Exception as e:
+            problems.append(f"{filename}: không giải nén được ({e})")
+            continue
+        if data != packages_data:
+            problems.append(f"{filename} không khớp với {PACKAGES_FILE}")
+
+    if os.path.exists(RELEASE_FILE):
+        fields = parse_fields(_read(RELEASE_FILE).decode("utf-8"))
+        digests = {}
+        for field, (hash_name, _) in zip(RELEASE_HASH_FIELDS, HASH_ALGORITHMS):
+            for line in fields.get(field, "").splitlines():
+                if not line.strip():
+                    continue
+                digest, size, filename = line.split()
+                if filename not in digests:
+                    if not os.path.exists(filename):
+                        problems.append(f"{RELEASE_FILE} liệt kê {filename} nhưng file không tồn tại")
+                        digests[filename] = None
+                        continue
+                    data = _read(filename)
+                    digests[filename] = (len(data), hash_bytes(data))
+                if digests[filename] is None:
+                    continue
+                actual_size, actual = digests[filename]
+                if int(size) != actual_size or digest != actual[hash_name]:
+                    problems.append(f"{RELEASE_FILE}: {field} của {filename} không khớp")
+    return problems
+
+
+def _local_path(url):
+    """Đường dẫn trong repo của URL thuộc site này, None nếu là URL ngoài."""
+    prefix = BASE_URL + "/"
+    if not url.startswith(prefix):
+        return None
+    return os.path.normpath(url[len(prefix):].split("#", 1)[0].split("?", 1)[0])
+
+
+def verify_packages(jobs=1, check_hash=False):
+    """So từng stanza của Packages với .deb thật: Size, 4 checksum, Package và Version.
+
+    .deb chưa đổi (theo cache) không phải đọc lại; check_hash=True thì hash lại SHA256
+    kể cả khi cache còn khớp. Đồng thời báo .deb không có trong Packages, Filename
+    trỏ tới file không tồn tại và Depiction/SileoDepiction không có file tương ứng.
+    Trả về danh sách lỗi (rỗng nếu mọi thứ khớp).
+    """
+    if not os.path.exists(PACKAGES_FILE):
+        return []
+    stanzas = {}
+    problems = []
+    for fields in iter_paragraphs(_read(PACKAGES_FILE).decode("utf-8")):
+        package = fields.get("Package", "?")
+        filename = fields.get("Filename")
+        if not filename:
+            problems.append(f"{package}: thiếu trường Filename")
+            continue
+        deb_path = os.path.normpath(filename)
+        if deb_path in stanzas:
+            problems.append(f"{deb_path} xuất hiện nhiều lần trong {PACKAGES_FILE}")
+            continue
+        stanzas[deb_path] = fields
+        if REPEATED_PREFIX.match(package):
+            print(f"⚠️ {package}: Package ID có tiền tố bị lặp")
+        for field in DEPICTION_FIELDS:
+            path = _local_path(fields.get(field, ""))
+            if path is not None and not os.path.isfile(path):
+                problems.append(f"{package}: {field} trỏ tới {path} nhưng file không tồn tại")
+
+    existing = []
+    for deb_path in stanzas:
+        if os.path.isfile(deb_path):
+            existing.append(deb_path)
+        else:
+            problems.append(f"{PACKAGES_FILE} liệt kê {deb_path} nhưng file không tồn tại")
+    for deb_path in list_debs():
+        if deb_path not in stanzas:
+            problems.append(f"{deb_path} không có trong {PACKAGES_FILE}")
+
+    cache = MetadataCache()
+    with stage("verify-debs"):
+        records, failures = scan_packages(existing, cache, check_hash, jobs)
+    cache.save()
+    for filename, error in failures:
+        problems.append(f"{filename}: không đọc được .deb ({error})")
+    for record in records:
+        fields = stanzas[record.deb_path]
+        # Cùng giá trị mặc định với PackageRecord.to_stanza()
+        expected = [("Size", str(record.size)), ("Package", record.get("Package", "unknown").lower()),
+                    ("Version", record.get("Version", "1.0.0"))]
+        expected += record.hashes.items()
+        for field, actual in expected:
+            if fields.get(field) != actual:
+                problems.append(f"{record.deb_path}: {field} trong {PACKAGES_FILE} là {fields.get(field)!r}, "
+                                f"file thật là {actual!r}")
+    print(f"🔍 Đã kiểm tra {len(records)} .deb (dùng lại cache cho {cache.hits}, đọc lại {cache.misses})")
+    return problems
@@ -0,0 +1,165 @@
+"""Chạy liên tục và cập nhật index khi debs/, descriptions/ hoặc images/ thay đổi."""
+import os
+import threading
+import time
+
+from .config import (DEB_FOLDER, DESCRIPTION_FOLDER, IMAGE_FOLDER, OVERRIDES_FILE, PACKAGES_FILE, PDIFF_HISTORY,
+                     WATCH_DEBOUNCE, WATCH_FOLDERS, WATCH_POLL_INTERVAL)
+from .images import optimize_images
+from .index import PackagesIndex, generate_packages, load_repository, update_packages
+from .publish import publish_indexes
+from .model import package_short_dir
+from .render import render_packages
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # tùy chọn: watch dùng inotify thay vì polling
+    Observer = None
+
+
+class _ChangeCollector:
+    """Gom đường dẫn thay đổi từ watchdog hoặc từ thread polling."""
+
+    def __init__(self):
+        self._paths = set()
+        self._lock = threading.Lock()
+        self.changed = threading.Event()
+        self.last_change = 0.0
+
+    def add(self, path):
+        with self._lock:
+            self._paths.add(os.path.normpath(os.path.relpath(path)))
+            self.last_change = time.monotonic()
+        self.changed.set()
+
+    def drain(self):
+        with self._lock:
+            paths, self._paths = self._paths, set()
+            self.changed.clear()
+        return paths
+
+
+def _snapshot(folders):
+    snapshot = {}
+    for folder in folders:
+        for root, _, files in os.walk(folder):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+def _poll_loop(folders, collector, interval, stop):
+    previous = _snapshot(folders)
+    while not stop.wait(interval):
+        current = _snapshot(folders)
+        for path in previous.keys() | current.keys():
+            if previous.get(path) != current.get(path):
+                collector.add(path)
+        previous = current
+
+
+def _start_watcher(folders, collector, poll_interval):
+    """Dùng inotify qua watchdog nếu có, không thì polling. Trả về hàm dừng watcher."""
+    if Observer is not None:
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    collector.add(event.src_path)
+                    if getattr(event, "dest_path", None):
+                        collector.add(event.dest_path)
+
+        observer = Observer()
+        for folder in folders:
+            observer.schedule(Handler(), folder, recursive=True)
+        observer.start()
+        print("👀 Theo dõi thay đổi bằng watchdog")
+
+        def stop_observer():
+            observer.stop()
+            observer.join()
+        return stop_observer
+
+    stop = threading.Event()
+    thread = threading.Thread(target=_poll_loop, args=(folders, collector, poll_interval, stop), daemon=True)
+    thread.start()
+    print(f"👀 Theo dõi thay đổi bằng polling mỗi {poll_interval}s (cài watchdog để dùng inotify)")
+    return stop.set
+
+
+def _classify_changes(paths):
+    """Tách các thay đổi thành: .deb cần index lại và short_dir chỉ cần render lại trang."""
+    debs, short_dirs = set(), set()
+    for path in paths:
+        parts = path.split(os.sep)
+        if parts[0] == DEB_FOLDER and len(parts) == 2 and path.endswith(".deb"):
+            debs.add(path)
+        elif parts[0] == DESCRIPTION_FOLDER and len(parts) == 3 and parts[2] == OVERRIDES_FILE:
+            # Chỉ overrides.json; depiction.json/HTML là file do chính gen.py ghi ra
+            short_dirs.add(parts[1])
+        elif parts[0] == IMAGE_FOLDER and len(parts) == 3:
+            short_dirs.add(parts[1])
+    return debs, short_dirs
+
+
+def _process_changes(paths, index, packages_data, levels, formats, pdiff, pdiff_history, check_hash):
+    """Xử lý một loạt thay đổi đã debounce; trả về nội dung Packages mới nhất."""
+    debs, short_dirs = _classify_changes(paths)
+    if debs:
+        started = time.monotonic()
+        new_data, _ = update_packages(sorted(debs), index=index, check_hash=check_hash)
+        if new_data != packages_data:
+            publish_indexes(new_data, packages_data, levels, formats, pdiff, pdiff_history)
+            packages_data = new_data
+        print(f"⏱️ Cập nhật index trong {time.monotonic() - started:.2f}s")
+
+    updated_dirs = {package_short_dir(os.path.basename(path)) for path in debs}
+    deb_paths = [os.path.normpath(filename) for filename in sorted(index.filenames())
+                 if package_short_dir(os.path.basename(filename)) in short_dirs - updated_dirs]
+    if deb_paths:
+        optimize_images()
+        packages, _ = load_repository(deb_paths)
+        render_packages(packages)
+    return packages_data
+
+
+def watch(levels=None, formats=None, pdiff=False, pdiff_history=PDIFF_HISTORY, check_hash=False,
+          debounce=WATCH_DEBOUNCE, poll_interval=WATCH_POLL_INTERVAL):
+    """Chạy liên tục: khi debs/, descriptions/ hoặc images/ thay đổi thì chỉ xử lý lại gói bị ảnh hưởng.
+
+    Map stanza được giữ trong bộ nhớ giữa các lần thay đổi nên mỗi lần chỉ tốn
+    chi phí của các .deb thực sự thay đổi cộng với bước nén.
+    """
+    if not os.path.exists(PACKAGES_FILE):
+        packages_data, _ = generate_packages(check_hash=check_hash)
+        publish_indexes(packages_data, None, levels, formats, pdiff, pdiff_history)
+    with open(PACKAGES_FILE, "rb") as f:
+        packages_data = f.read()
+    index = PackagesIndex.from_text(packages_data.decode("utf-8"))
+
+    folders = [folder for folder in WATCH_FOLDERS if os.path.isdir(folder)]
+    collector = _ChangeCollector()
+    stop_watcher = _start_watcher(folders, collector, poll_interval)
+    try:
+        while True:
+            collector.changed.wait()
+            # Debounce: đợi tới khi hết loạt thay đổi liên tiếp (vd. đang copy file lớn)
+            while time.monotonic() - collector.last_change < debounce:
+                time.sleep(debounce / 4)
+            try:
+                packages_data = _process_changes(collector.drain(), index, packages_data, levels, formats,
+                                                 pdiff, pdiff_history, check_hash)
+            except Exception as e:
+                # Lỗi của một loạt thay đổi (vd. overrides.json đang sửa dở) không được làm dừng watch
+                print(f"❌ Lỗi khi xử lý thay đổi, tiếp tục theo dõi: {type(e).__name__}: {e}")
+                # Map stanza có thể đã bị sửa dở: dựng lại từ Packages đã publish
+                index = PackagesIndex.from_text(packages_data.decode("utf-8"))
+    except KeyboardInterrupt:
+        print("👋 Dừng theo dõi")
+    finally:
+        stop_watcher()
@@ -3,8 +3,9 @@
 # Thoát nếu có lỗi
 set -e
 
-echo "🚀 Chạy generate_bz2.py..."
-python3 generate_bz2.py
+echo "🚀 Tạo Packages, trang gói và Release..."
+python3 -m repogen index
+python3 -m repogen verify
 
 echo "📁 Thêm file vào Git..."
 git add .